@@ -1,6 +1,9 @@
-from typing import List, Tuple, Optional, Set
-from collections import deque
+from typing import List, Tuple, Optional, Set, Dict, Callable
+from collections import deque, OrderedDict
+from io import BytesIO
+from array import array
 import heapq
+import numpy as np
 
 class Direction:
     """
@@ -15,13 +18,205 @@ class Direction:
     DOWN_LEFT = (1, -1)
     DOWN_RIGHT = (1, 1)
 
+def obstacle_distance(blocked: np.ndarray, max_distance: int,
+                      diagonal: bool = False) -> np.ndarray:
+    """
+    Векторизованное преобразование расстояний до препятствий
+    
+    Расстояние считается волной бинарных расширений: манхэттенское для
+    движения по 4 направлениям, по Чебышёву - для 8 направлений.
+    Край карты тоже считается стеной. Значения ограничены max_distance.
+    
+    Args:
+        blocked: Булева маска препятствий (rows x cols)
+        max_distance: Максимальное вычисляемое расстояние
+        diagonal: Учитывать ли диагональных соседей
+        
+    Returns:
+        np.ndarray: Расстояние от каждой клетки до ближайшего препятствия
+    """
+    reached = np.pad(blocked.astype(bool), 1, constant_values=True)
+    dist = np.full(reached.shape, max_distance, dtype=np.int32)
+    dist[reached] = 0
+    
+    for d in range(1, max_distance):
+        grow = reached.copy()
+        grow[1:, :] |= reached[:-1, :]
+        grow[:-1, :] |= reached[1:, :]
+        grow[:, 1:] |= reached[:, :-1]
+        grow[:, :-1] |= reached[:, 1:]
+        if diagonal:
+            grow[1:, 1:] |= reached[:-1, :-1]
+            grow[1:, :-1] |= reached[:-1, 1:]
+            grow[:-1, 1:] |= reached[1:, :-1]
+            grow[:-1, :-1] |= reached[1:, 1:]
+        dist[grow & ~reached] = d
+        reached = grow
+        if reached.all():
+            break
+    
+    return dist[1:-1, 1:-1]
+
+class _HeapOpenList:
+    """Открытый список A* на двоичной куче (heapq)"""
+    __slots__ = ('_heap',)
+    
+    def __init__(self):
+        self._heap = []
+    
+    def push(self, f_score, g_score, position, path):
+        heapq.heappush(self._heap, (f_score, g_score, position, path))
+    
+    def pop(self):
+        return heapq.heappop(self._heap)
+    
+    def __len__(self):
+        return len(self._heap)
+
+class _BucketOpenList:
+    """
+    Открытый список A* на корзинах (очередь Дейкстры/Dial)
+    
+    Работает только с целыми f и g: push и pop за O(1) без сравнения кортежей.
+    Порядок извлечения такой же, как у кучи: сначала меньший f, при равном f -
+    меньший g, при равных (f, g) - меньшая позиция (корзина - маленькая куча),
+    поэтому пути совпадают с путями на куче вплоть до выбора среди равных.
+    Опустевшие корзины по f освобождаются, поэтому при согласованной
+    эвристике память линейна по длине пути.
+    """
+    __slots__ = ('_buckets', '_min_g', '_min_f', '_size')
+    
+    def __init__(self):
+        self._buckets = []      # f -> список корзин по g (None - корзина пуста)
+        self._min_g = []        # f -> нижняя граница g среди элементов
+        self._min_f = 0
+        self._size = 0
+    
+    def push(self, f_score, g_score, position, path):
+        f, g = int(f_score), int(g_score)
+        buckets = self._buckets
+        if f >= len(buckets):
+            grow = f + 1 - len(buckets)
+            buckets.extend([None] * grow)
+            self._min_g.extend([0] * grow)
+        
+        by_g = buckets[f]
+        if by_g is None:
+            by_g = buckets[f] = []
+            self._min_g[f] = g
+        elif g < self._min_g[f]:
+            self._min_g[f] = g
+        if g >= len(by_g):
+            by_g.extend([] for _ in range(g + 1 - len(by_g)))
+        heapq.heappush(by_g[g], (position, path))
+        
+        if f < self._min_f or not self._size:
+            self._min_f = f
+        self._size += 1
+    
+    def pop(self):
+        if not self._size:
+            raise IndexError('pop from empty bucket queue')
+        buckets = self._buckets
+        f = self._min_f
+        by_g = buckets[f]
+        g = self._min_g[f]
+        while True:
+            if by_g is not None:
+                n = len(by_g)
+                while g < n and not by_g[g]:
+                    g += 1
+                if g < n:
+                    break
+                buckets[f] = None
+            f += 1
+            by_g = buckets[f]
+            g = self._min_g[f]
+        
+        self._min_f = f
+        self._min_g[f] = g
+        position, path = heapq.heappop(by_g[g])
+        self._size -= 1
+        return f, g, position, path
+    
+    def __len__(self):
+        return self._size
+
+class FlowField:
+    """
+    Поле направлений к одной цели: для каждой клетки хранится направление
+    следующего шага по кратчайшему пути и расстояние до цели.
+    Любое число роботов читает свой следующий шаг за O(1).
+    """
+    
+    def __init__(self, goal: Tuple[int, int], rows: int, cols: int,
+                 directions: List[Tuple[int, int]]):
+        self.goal = goal
+        self.rows = rows
+        self.cols = cols
+        self.directions = directions
+        self.version = -1  # версия карты, для которой поле актуально
+        self.distances = array('d', [float('inf')]) * (rows * cols)
+        self.next_dir = array('b', [-1]) * (rows * cols)  # индекс в directions
+    
+    def direction(self, row: int, col: int) -> Optional[Tuple[int, int]]:
+        """Направление следующего шага из клетки или None (цель/недостижимо)"""
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            return None
+        k = self.next_dir[row * self.cols + col]
+        return self.directions[k] if k >= 0 else None
+    
+    def next_step(self, row: int, col: int) -> Optional[Tuple[int, int]]:
+        """Следующая клетка на пути к цели или None"""
+        d = self.direction(row, col)
+        return (row + d[0], col + d[1]) if d else None
+    
+    def distance(self, row: int, col: int) -> float:
+        """Расстояние до цели (бесконечность, если цель недостижима)"""
+        return self.distances[row * self.cols + col]
+    
+    def path_from(self, start: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+        """Полный путь от start до цели по полю направлений"""
+        if self.distance(*start) == float('inf'):
+            return None
+        path = [start]
+        current_pos = start
+        while current_pos != self.goal and len(path) <= self.rows * self.cols:
+            current_pos = self.next_step(*current_pos)
+            path.append(current_pos)
+        return path
+
 class RobotPathFinder:
     """Класс для поиска пути робота по матрице с точками"""
     
+    # Сколько полей направлений держать в кэше одновременно
+    MAX_FLOW_FIELDS = 8
+    # Сколько последних изменений карты помнить для инкрементальных пересчётов
+    CHANGE_LOG_SIZE = 32
+    # Сколько наборов альтернативных маршрутов держать в кэше
+    MAX_ROUTE_CACHE = 32
+    # Сколько готовых изображений карты с путём держать в кэше
+    MAX_RENDER_CACHE = 16
+    # Субоптимальность IDA* по умолчанию для дробных стоимостей: без неё
+    # каждая итерация поднимает порог до следующего значения f, а различных
+    # f с диагоналями или штрафом зазора тысячи
+    IDA_EPSILON = 0.05
+    # Сколько позиций просматривает волна поиска следующей ячейки покрытия
+    COVERAGE_SEARCH_LIMIT = 1024
+    # Цвета PNG-карты: свободно, препятствие, путь, старт, финиш, точка
+    RENDER_PALETTE = [(255, 255, 255), (40, 40, 40), (66, 133, 244),
+                      (0, 170, 0), (220, 0, 0), (255, 170, 0)]
+    
     def __init__(self, matrix: List[List[int]], 
                  obstacles: List[int] = None,
                  allow_diagonal: bool = False,
-                 robot_size: int = 1):
+                 robot_size: int = 1,
+                 num_landmarks: int = 0,
+                 open_list: str = 'heap',
+                 clearance_weight: float = 0.0,
+                 clearance_radius: int = 3,
+                 memory_budget: Optional[int] = None,
+                 ida_epsilon: Optional[float] = None):
         """
         Инициализация поиска пути для робота
         
@@ -30,17 +225,90 @@ class RobotPathFinder:
             obstacles: значения, которые считаются препятствиями
             allow_diagonal: разрешены ли диагональные движения
             robot_size: размер робота в клетках (1 = занимает 1 клетку)
+            num_landmarks: число ориентиров для эвристики ALT (0 = выключена).
+                Каждый ориентир хранит таблицу расстояний rows*cols чисел:
+                больше ориентиров - точнее эвристика, но больше памяти и
+                дольше пересчёт после изменения карты
+            open_list: открытый список A*: 'heap' (heapq, по умолчанию),
+                'bucket' (корзины, только для целых стоимостей, иначе
+                ValueError) или 'auto' - корзины выбираются сами, когда все
+                стоимости и эвристика целые. Пути одинаковы при любом выборе
+            clearance_weight: штраф за близость к препятствиям (0 = выключен).
+                Шаг дорожает на clearance_weight * (clearance_radius - зазор),
+                поэтому путь держится подальше от стеллажей
+            clearance_radius: зазор в клетках, начиная с которого штрафа нет
+            memory_budget: режим ограниченной памяти для слабых плат (Pi Zero):
+                максимальное число записей таблицы транспозиций IDA*.
+                Если задан, find_path_astar ищет путь через find_path_ida
+            ida_epsilon: субоптимальность IDA* (см. find_path_ida). None - 0
+                для целых стоимостей и IDA_EPSILON для дробных (диагонали,
+                clearance_weight)
         """
-        self.matrix = matrix
+        # Своя копия: правки сетки вызывающим без update_environment не должны
+        # менять карту в обход grid_version и кэшей
+        self.matrix = [row[:] for row in matrix]
         self.rows = len(matrix)
         self.cols = len(matrix[0]) if matrix else 0
         self.obstacles = set(obstacles) if obstacles else {1}
         self.allow_diagonal = allow_diagonal
         self.robot_size = robot_size
+        self.open_list = open_list
+        self.clearance_weight = clearance_weight
+        self.clearance_radius = clearance_radius
+        self.memory_budget = memory_budget
+        self.ida_epsilon = ida_epsilon
+        self._check_open_list()
         
         # Сохраняем начальное состояние матрицы для отслеживания изменений
         self.initial_matrix = [row[:] for row in matrix]
         
+        # Версия карты - увеличивается при каждом изменении среды,
+        # по ней кэши понимают, что их нужно пересчитать
+        self.grid_version = 0
+        self._change_log = deque(maxlen=self.CHANGE_LOG_SIZE)  # (версия, клетки)
+        
+        # Ориентиры (landmarks) для эвристики ALT, пересчитываются лениво
+        self.num_landmarks = num_landmarks
+        self.landmarks: List[Tuple[int, int]] = []
+        self._landmark_tables: List[array] = []
+        self._landmarks_version = -1
+        
+        # Маска препятствий, поле зазоров и штрафы - пересчитываются лениво
+        self._obstacle_mask_cache = None
+        self._obstacle_mask_version = -1
+        self._valid_mask_cache = None
+        self._valid_mask_version = -1
+        self._clearance = None
+        self._clearance_penalty = None
+        self._clearance_version = -1
+        
+        # Профилирование: число раскрытий каждой клетки (None - выключено)
+        self._expansion_counts: Optional[array] = None
+        # Число итераций последнего поиска find_path_ida
+        self.ida_iterations = 0
+        
+        # Метки компонент связности для быстрой проверки достижимости
+        self._components = None
+        self._components_version = -1
+        
+        # Поля направлений по целям
+        self._flow_fields: Dict[Tuple[int, int], FlowField] = {}
+        
+        # Кэш альтернативных маршрутов: (start, end, версия карты) -> состояние Yen
+        self._route_cache: Dict[tuple, dict] = {}
+        
+        # Готовые изображения: (вид, версия карты, путь, точки, ...) -> текст/PNG
+        self._render_cache: OrderedDict = OrderedDict()
+        
+        # Пирамида уменьшенных карт: коэффициент -> (версия карты, грубый поиск)
+        self._pyramid: Dict[int, Tuple[int, 'RobotPathFinder']] = {}
+        
+        # Активные маршруты и обратный индекс: клетка карты -> id маршрутов
+        self.active_paths: Dict[object, List[Tuple[int, int]]] = {}
+        self._path_index: Dict[Tuple[int, int], Set[object]] = {}
+        # Маршруты, через которые прошло новое препятствие (см. pop_invalidated_paths)
+        self.invalidated_paths: Set[object] = set()
+        
         # Направления движения
         self.directions = [
             Direction.UP, Direction.DOWN, 
@@ -52,6 +320,96 @@ class RobotPathFinder:
                 Direction.DOWN_LEFT, Direction.DOWN_RIGHT
             ])
     
+    def update_environment(self, new_matrix: List[List[int]]) -> bool:
+        """
+        Обновление информации о среде и проверка, изменилась ли она
+        
+        Args:
+            new_matrix: Новая матрица среды
+            
+        Returns:
+            bool: True если среда изменилась, False если нет
+        """
+        if len(new_matrix) != self.rows or len(new_matrix[0]) != self.cols:
+            raise ValueError("Размер новой матрицы не соответствует текущему")
+        
+        # Ищем изменившиеся клетки
+        changed = [
+            (i, j)
+            for i, (old_row, new_row) in enumerate(zip(self.matrix, new_matrix))
+            if old_row != new_row
+            for j in range(self.cols) if old_row[j] != new_row[j]
+        ]
+        
+        # Обновляем матрицу среды (копией - см. __init__)
+        self.matrix = [row[:] for row in new_matrix]
+        self._record_changes(changed)
+        
+        return bool(changed)
+    
+    def update_cells(self, changes: Dict[Tuple[int, int], int]) -> bool:
+        """
+        Точечное обновление клеток карты за O(числа изменённых клеток)
+        
+        Args:
+            changes: Словарь {(row, col): новое значение}
+            
+        Returns:
+            bool: True если среда изменилась, False если нет
+        """
+        # Отрицательный индекс списка молча изменил бы чужую клетку, а в журнал
+        # попала бы несуществующая, поэтому все клетки проверяются до записи
+        for row, col in changes:
+            if not (0 <= row < self.rows and 0 <= col < self.cols):
+                raise ValueError(f"Клетка ({row}, {col}) вне карты {self.rows}x{self.cols}")
+        changed = []
+        for (row, col), value in changes.items():
+            if self.matrix[row][col] != value:
+                self.matrix[row][col] = value
+                changed.append((row, col))
+        self._record_changes(changed)
+        return bool(changed)
+    
+    def _record_changes(self, changed: List[Tuple[int, int]]):
+        """
+        Увеличение версии карты, запись изменённых клеток в журнал и отметка
+        активных маршрутов, через которые прошло новое препятствие
+        """
+        if changed:
+            self.grid_version += 1
+            self._change_log.append((self.grid_version, changed))
+            blocked = [(r, c) for r, c in changed if self.matrix[r][c] in self.obstacles]
+            self.invalidated_paths |= self.affected_paths(blocked)
+    
+    def _changes_since(self, version: int) -> Optional[Set[Tuple[int, int]]]:
+        """
+        Клетки карты, изменённые после версии version
+        
+        Returns:
+            Optional[Set[Tuple[int, int]]]: Множество клеток или None,
+            если журнал уже не хранит столь старых изменений
+        """
+        if version == self.grid_version:
+            return set()
+        if not self._change_log or self._change_log[0][0] > version + 1:
+            return None
+        cells = set()
+        for changed_version, changed in self._change_log:
+            if changed_version > version:
+                cells.update(changed)
+        return cells
+    
+    def _affected_positions(self, cells) -> Set[Tuple[int, int]]:
+        """Позиции робота, допустимость которых зависит от данных клеток карты"""
+        positions = set()
+        for row, col in cells:
+            for dr in range(self.robot_size):
+                for dc in range(self.robot_size):
+                    r, c = row - dr, col - dc
+                    if r >= 0 and c >= 0:
+                        positions.add((r, c))
+        return positions
+    
     def is_cell_free(self, row: int, col: int) -> bool:
         """
         Проверка, свободна ли клетка с учетом размера робота
@@ -106,6 +464,231 @@ class RobotPathFinder:
                 neighbors.append((new_row, new_col))
         return neighbors
     
+    def obstacle_mask(self) -> np.ndarray:
+        """Булева маска препятствий текущей карты (кэшируется по версии карты)"""
+        if self._obstacle_mask_version != self.grid_version:
+            grid = np.asarray(self.matrix)
+            self._obstacle_mask_cache = np.isin(grid, list(self.obstacles))
+            self._obstacle_mask_version = self.grid_version
+        return self._obstacle_mask_cache
+    
+    def valid_position_mask(self) -> np.ndarray:
+        """
+        Булева маска допустимых позиций робота с учётом его размера
+        (то же, что is_valid_position для каждой клетки, но одним проходом)
+        """
+        if self._valid_mask_version != self.grid_version:
+            free = ~self.obstacle_mask()
+            size = self.robot_size
+            h, w = self.rows - size + 1, self.cols - size + 1
+            valid = np.zeros((self.rows, self.cols), dtype=bool)
+            if h > 0 and w > 0:
+                block = free[:h, :w].copy()
+                for dr in range(size):
+                    for dc in range(size):
+                        block &= free[dr:dr + h, dc:dc + w]
+                valid[:h, :w] = block
+            self._valid_mask_cache = valid
+            self._valid_mask_version = self.grid_version
+        return self._valid_mask_cache
+    
+    def get_clearance_field(self) -> np.ndarray:
+        """
+        Поле зазоров: для каждой позиции робота - расстояние в клетках от
+        занимаемых им клеток до ближайшего препятствия или края карты
+        (0 для недопустимых позиций, не больше clearance_radius).
+        Считается один раз на версию карты.
+        """
+        if self._clearance_version != self.grid_version:
+            self._compute_clearance()
+        return self._clearance
+    
+    def _compute_clearance(self):
+        """Расчёт поля зазоров и таблицы штрафов для функции стоимости"""
+        radius = max(1, self.clearance_radius)
+        dist = obstacle_distance(self.obstacle_mask(), radius, self.allow_diagonal)
+        
+        # Зазор позиции - минимум по клеткам, которые занимает робот
+        size = self.robot_size
+        h, w = self.rows - size + 1, self.cols - size + 1
+        clearance = np.zeros((self.rows, self.cols), dtype=np.int32)
+        if h > 0 and w > 0:
+            block = dist[:h, :w].copy()
+            for dr in range(size):
+                for dc in range(size):
+                    np.minimum(block, dist[dr:dr + h, dc:dc + w], out=block)
+            clearance[:h, :w] = block
+        
+        penalty = self.clearance_weight * np.maximum(radius - clearance, 0)
+        self._clearance = clearance
+        # Списки Python - быстрее поэлементного доступа к массиву numpy в поиске
+        self._clearance_penalty = penalty.tolist()
+        self._clearance_version = self.grid_version
+    
+    def _move_cost(self, a: Tuple[int, int], b: Tuple[int, int]) -> float:
+        """
+        Стоимость перехода (1 для ортогональных, sqrt(2) для диагональных)
+        плюс штраф за близость к препятствиям, если он включён.
+        Штраф делится поровну между концами шага, чтобы стоимость была
+        симметричной (это нужно для ALT и полей направлений).
+        """
+        cost = 1.0
+        if abs(b[0] - a[0]) + abs(b[1] - a[1]) == 2:
+            cost = 1.414  # sqrt(2) для диагональных движений
+        if self.clearance_weight:
+            if self._clearance_version != self.grid_version:
+                self._compute_clearance()
+            penalty = self._clearance_penalty
+            cost += (penalty[a[0]][a[1]] + penalty[b[0]][b[1]]) * 0.5
+        return cost
+    
+    def _dijkstra_from(self, source: Tuple[int, int]) -> array:
+        """
+        Расстояния от source до всех клеток (алгоритм Дейкстры)
+        
+        Args:
+            source: Исходная позиция (row, col)
+            
+        Returns:
+            array: Плоская таблица расстояний размером rows*cols,
+                   для недостижимых клеток - бесконечность
+        """
+        inf = float('inf')
+        cols = self.cols
+        dist = array('d', [inf]) * (self.rows * cols)
+        dist[source[0] * cols + source[1]] = 0.0
+        open_set = [(0.0, source)]
+        counts = self._expansion_counts
+        
+        while open_set:
+            d, current_pos = heapq.heappop(open_set)
+            if d > dist[current_pos[0] * cols + current_pos[1]]:
+                continue
+            if counts is not None:
+                counts[current_pos[0] * cols + current_pos[1]] += 1
+            for neighbor in self.get_neighbors(*current_pos):
+                new_d = d + self._move_cost(current_pos, neighbor)
+                idx = neighbor[0] * cols + neighbor[1]
+                if new_d < dist[idx]:
+                    dist[idx] = new_d
+                    heapq.heappush(open_set, (new_d, neighbor))
+        
+        return dist
+    
+    def _select_landmarks(self):
+        """
+        Выбор ориентиров методом farthest-point и расчёт таблиц расстояний.
+        Первый ориентир - самая дальняя клетка от первой свободной,
+        каждый следующий - клетка, наиболее удалённая от уже выбранных.
+        """
+        self.landmarks = []
+        self._landmark_tables = []
+        self._landmarks_version = self.grid_version
+        
+        seed = next(((r, c) for r in range(self.rows) for c in range(self.cols)
+                     if self.is_valid_position(r, c)), None)
+        if seed is None or self.num_landmarks <= 0:
+            return
+        
+        inf = float('inf')
+        min_dist = self._dijkstra_from(seed)
+        for _ in range(self.num_landmarks):
+            best_idx, best_d = -1, 0.0
+            for idx, d in enumerate(min_dist):
+                if best_d < d < inf:
+                    best_idx, best_d = idx, d
+            if best_idx < 0:
+                break  # все достижимые клетки уже являются ориентирами
+            
+            landmark = divmod(best_idx, self.cols)
+            table = self._dijkstra_from(landmark)
+            self.landmarks.append(landmark)
+            self._landmark_tables.append(table)
+            
+            if len(self.landmarks) == 1:
+                min_dist = array('d', table)
+            else:
+                for idx, d in enumerate(table):
+                    if d < min_dist[idx]:
+                        min_dist[idx] = d
+    
+    def _ensure_landmarks(self):
+        """Ленивый пересчёт ориентиров после изменения карты"""
+        if self._landmarks_version != self.grid_version:
+            self._select_landmarks()
+    
+    def _heuristic_to(self, end: Tuple[int, int]):
+        """
+        Построение эвристики для цели end
+        
+        Манхэттенское расстояние (или евклидово при диагональных движениях),
+        усиленное нижними оценками ALT по неравенству треугольника:
+        d(n, end) >= |d(L, end) - d(L, n)| для каждого ориентира L
+        
+        Args:
+            end: Конечная позиция (row, col)
+            
+        Returns:
+            Callable[[Tuple[int, int]], float]: функция оценки расстояния до end
+        """
+        end_row, end_col = end
+        
+        if self.allow_diagonal:
+            def base(a: Tuple[int, int]) -> float:
+                # Евклидово расстояние
+                return ((a[0] - end_row)**2 + (a[1] - end_col)**2) ** 0.5
+        else:
+            def base(a: Tuple[int, int]) -> float:
+                # Манхэттенское расстояние
+                return abs(a[0] - end_row) + abs(a[1] - end_col)
+        
+        if self.num_landmarks <= 0:
+            return base
+        
+        self._ensure_landmarks()
+        inf = float('inf')
+        cols = self.cols
+        end_idx = end_row * cols + end_col
+        # Пары (таблица, расстояние от ориентира до цели)
+        tables = [(table, table[end_idx]) for table in self._landmark_tables]
+        
+        def alt(a: Tuple[int, int]) -> float:
+            h = base(a)
+            idx = a[0] * cols + a[1]
+            for table, to_end in tables:
+                d = table[idx]
+                if d == inf or to_end == inf:
+                    if d != to_end:
+                        return inf  # клетки в разных компонентах связности
+                    continue
+                lower = d - to_end if d > to_end else to_end - d
+                if lower > h:
+                    h = lower
+            return h
+        
+        return alt
+    
+    def _costs_are_integral(self) -> bool:
+        """
+        Проверка, что стоимости переходов и эвристика принимают целые значения
+        (только ортогональные шаги стоимостью 1 и манхэттенская эвристика/ALT)
+        """
+        return not self.allow_diagonal and not self.clearance_weight
+    
+    def _check_open_list(self):
+        """Корзины округляли бы дробные стоимости (1.414, штраф зазора) до целых"""
+        if self.open_list == 'bucket' and not self._costs_are_integral():
+            raise ValueError("open_list='bucket' работает только с целыми стоимостями: "
+                             "без диагоналей и без clearance_weight")
+    
+    def _make_open_list(self):
+        """Создание открытого списка A* согласно настройке open_list"""
+        self._check_open_list()
+        if self.open_list == 'bucket' or (
+                self.open_list == 'auto' and self._costs_are_integral()):
+            return _BucketOpenList()
+        return _HeapOpenList()
+    
     def find_path_astar(self, start: Tuple[int, int],
                        end: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
         """
@@ -122,28 +705,48 @@ class RobotPathFinder:
         if not (self.is_valid_position(*start) and self.is_valid_position(*end)):
             return None
         
-        def heuristic(a: Tuple[int, int], b: Tuple[int, int]) -> float:
-            """Манхэттенское расстояние или евклидово для диагональных движений"""
-            if self.allow_diagonal:
-                # Евклидово расстояние
-                return ((a[0] - b[0])**2 + (a[1] - b[1])**2) ** 0.5
-            else:
-                # Манхэттенское расстояние
-                return abs(a[0] - b[0]) + abs(a[1] - b[1])
+        if self.memory_budget is not None:
+            return self.find_path_ida(start, end)
         
-        open_set = []
-        heapq.heappush(open_set, (0, 0, start, [start]))  # (f_score, g_score, position, path)
+        return self._astar_search(start, end)
+    
+    def _astar_search(self, start: Tuple[int, int], end: Tuple[int, int],
+                      banned_cells: Optional[Set[Tuple[int, int]]] = None,
+                      banned_moves: Optional[Set[Tuple[Tuple[int, int], Tuple[int, int]]]] = None,
+                      allowed_cells: Optional[Set[Tuple[int, int]]] = None
+                      ) -> Optional[List[Tuple[int, int]]]:
+        """
+        Основной цикл A*
+        
+        Args:
+            start: Стартовая позиция (row, col)
+            end: Конечная позиция (row, col)
+            banned_cells: Клетки, через которые нельзя проходить
+            banned_moves: Запрещённые шаги (откуда, куда)
+            allowed_cells: Если задано - поиск не выходит за эти клетки (коридор)
+            
+        Returns:
+            Optional[List[Tuple[int, int]]]: Список позиций от start до end или None если путь не найден
+        """
+        heuristic = self._heuristic_to(end)
+        inf = float('inf')
+        
+        open_set = self._make_open_list()
+        open_set.push(0, 0, start, [start])  # (f_score, g_score, position, path)
         
         g_scores = {start: 0}
         visited = set()
+        counts = self._expansion_counts
         
         while open_set:
-            f_score, g_score, current_pos, path = heapq.heappop(open_set)
+            f_score, g_score, current_pos, path = open_set.pop()
             
             if current_pos in visited:
                 continue
                 
             visited.add(current_pos)
+            if counts is not None:
+                counts[current_pos[0] * self.cols + current_pos[1]] += 1
             
             if current_pos == end:
                 return path
@@ -151,22 +754,1187 @@ class RobotPathFinder:
             for neighbor in self.get_neighbors(*current_pos):
                 if neighbor in visited:
                     continue
+                if banned_cells and neighbor in banned_cells:
+                    continue
+                if banned_moves and (current_pos, neighbor) in banned_moves:
+                    continue
+                if allowed_cells is not None and neighbor not in allowed_cells:
+                    continue
                 
-                # Стоимость перехода (1 для ортогональных, sqrt(2) для диагональных)
-                move_cost = 1.0
-                if abs(neighbor[0] - current_pos[0]) + abs(neighbor[1] - current_pos[1]) == 2:
-                    move_cost = 1.414  # sqrt(2) для диагональных движений
-                
-                new_g_score = g_score + move_cost
+                new_g_score = g_score + self._move_cost(current_pos, neighbor)
                 
                 if neighbor not in g_scores or new_g_score < g_scores[neighbor]:
                     g_scores[neighbor] = new_g_score
-                    f_score = new_g_score + heuristic(neighbor, end)
+                    f_score = new_g_score + heuristic(neighbor)
+                    if f_score == inf:
+                        continue  # цель недостижима из этой клетки
                     new_path = path + [neighbor]
-                    heapq.heappush(open_set, (f_score, new_g_score, neighbor, new_path))
+                    open_set.push(f_score, new_g_score, neighbor, new_path)
+        
+        return None
+    
+    def _component_labels(self) -> array:
+        """
+        Метки компонент связности позиций (плоский массив rows*cols, -1 для
+        недопустимых позиций). Считаются один раз на версию карты и занимают
+        4 байта на клетку - используются для быстрого отказа от поиска
+        к недостижимой цели.
+        """
+        if self._components_version != self.grid_version:
+            cols = self.cols
+            labels = array('i', [-1]) * (self.rows * cols)
+            label = 0
+            for r in range(self.rows):
+                for c in range(cols):
+                    if labels[r * cols + c] >= 0 or not self.is_valid_position(r, c):
+                        continue
+                    labels[r * cols + c] = label
+                    queue = deque([(r, c)])
+                    while queue:
+                        current_pos = queue.popleft()
+                        for nr, nc in self.get_neighbors(*current_pos):
+                            if labels[nr * cols + nc] < 0:
+                                labels[nr * cols + nc] = label
+                                queue.append((nr, nc))
+                    label += 1
+            self._components = labels
+            self._components_version = self.grid_version
+        return self._components
+    
+    def is_reachable(self, start: Tuple[int, int], end: Tuple[int, int]) -> bool:
+        """
+        Проверка, существует ли путь между позициями (без поиска самого пути)
+        
+        Args:
+            start: Стартовая позиция (row, col)
+            end: Конечная позиция (row, col)
+            
+        Returns:
+            bool: True если обе позиции допустимы и лежат в одной компоненте
+        """
+        if not (self.is_valid_position(*start) and self.is_valid_position(*end)):
+            return False
+        labels = self._component_labels()
+        return labels[start[0] * self.cols + start[1]] == labels[end[0] * self.cols + end[1]]
+    
+    def find_path_ida(self, start: Tuple[int, int],
+                      end: Tuple[int, int],
+                      memory_budget: Optional[int] = None,
+                      epsilon: Optional[float] = None) -> Optional[List[Tuple[int, int]]]:
+        """
+        Поиск пути с ограниченной памятью: IDA* (A* с итеративным углублением)
+        
+        Память - текущий путь плюс таблица транспозиций (лучшее g для клетки
+        в текущей итерации), размер которой не превышает memory_budget.
+        Когда таблица заполнена, из неё вытесняются самые глубокие клетки
+        (с наибольшим g) в пользу более близких к старту: поиск становится
+        медленнее, но остаётся корректным. Слишком маленькая таблица
+        (меньше числа клеток в коридоре поиска) резко увеличивает число
+        повторных раскрытий. Недостижимые цели отсекаются сразу по меткам
+        компонент связности.
+        
+        Args:
+            start: Стартовая позиция (row, col)
+            end: Конечная позиция (row, col)
+            memory_budget: Максимум записей таблицы (по умолчанию self.memory_budget)
+            epsilon: Допустимая субоптимальность: порог f растёт минимум
+                в (1 + epsilon) раз за итерацию, путь не длиннее (1 + epsilon)
+                оптимального, зато итераций меньше. 0 - оптимальный путь.
+                По умолчанию self.ida_epsilon, если он не задан - 0 для целых
+                стоимостей и IDA_EPSILON для дробных
+            
+        Returns:
+            Optional[List[Tuple[int, int]]]: Список позиций от start до end или None если путь не найден
+        """
+        if not self.is_reachable(start, end):
+            return None
+        
+        if memory_budget is None:
+            memory_budget = self.memory_budget if self.memory_budget is not None else 10000
+        if epsilon is None:
+            epsilon = self.ida_epsilon
+        if epsilon is None:
+            epsilon = 0.0 if self._costs_are_integral() else self.IDA_EPSILON
+        heuristic = self._heuristic_to(end)
+        inf = float('inf')
+        
+        def successors(position: Tuple[int, int]):
+            # Сначала соседи, которые ближе к цели - быстрее находим путь
+            return iter(sorted(self.get_neighbors(*position), key=heuristic))
+        
+        counts = self._expansion_counts
+        threshold = heuristic(start)
+        self.ida_iterations = 0
+        while threshold < inf:
+            self.ida_iterations += 1
+            path = [start]
+            on_path = {start}
+            table = {start: 0.0}
+            deepest = [(0.0, start)]  # куча (-g, позиция) для вытеснения
+            next_threshold = inf
+            stack = [(start, 0.0, successors(start))]  # (позиция, g, соседи)
+            
+            while stack:
+                current_pos, g_score, neighbors = stack[-1]
+                if current_pos == end:
+                    return path
+                
+                for neighbor in neighbors:
+                    if neighbor in on_path:
+                        continue
+                    new_g_score = g_score + self._move_cost(current_pos, neighbor)
+                    f_score = new_g_score + heuristic(neighbor)
+                    if f_score > threshold + 1e-9:
+                        if f_score < next_threshold:
+                            next_threshold = f_score
+                        continue
+                    
+                    seen = table.get(neighbor)
+                    if seen is not None and seen <= new_g_score:
+                        continue  # уже были здесь с не большей стоимостью
+                    if seen is None and len(table) >= memory_budget:
+                        # Таблица заполнена: вытесняем самую глубокую запись,
+                        # если новая клетка ближе к старту (её поддерево больше)
+                        while deepest and table.get(deepest[0][1]) != -deepest[0][0]:
+                            heapq.heappop(deepest)
+                        if deepest and -deepest[0][0] > new_g_score:
+                            del table[heapq.heappop(deepest)[1]]
+                    if seen is not None or len(table) < memory_budget:
+                        table[neighbor] = new_g_score
+                        heapq.heappush(deepest, (-new_g_score, neighbor))
+                        if len(deepest) > 2 * memory_budget:
+                            # Убираем устаревшие записи кучи
+                            deepest = [(-g, pos) for pos, g in table.items()]
+                            heapq.heapify(deepest)
+                    
+                    path.append(neighbor)
+                    on_path.add(neighbor)
+                    stack.append((neighbor, new_g_score, successors(neighbor)))
+                    if counts is not None:
+                        counts[neighbor[0] * self.cols + neighbor[1]] += 1
+                    break
+                else:
+                    # Все соседи просмотрены - возвращаемся назад
+                    stack.pop()
+                    on_path.discard(path.pop())
+            
+            threshold = max(next_threshold, threshold * (1 + epsilon))
+        
+        return None
+    
+    def find_path_multires(self, start: Tuple[int, int],
+                           end: Tuple[int, int],
+                           factor: int = 2,
+                           corridor: int = 1) -> Optional[List[Tuple[int, int]]]:
+        """
+        Поиск пути от грубого к точному для длинных маршрутов
+        
+        Сначала маршрут ищется на карте, уменьшенной в factor раз: клетка
+        уменьшенной карты свободна, только если робот может стоять в любой
+        позиции её блока (консервативный max-pooling препятствий). Затем A*
+        на полной карте уточняет путь только внутри коридора шириной corridor
+        блоков вокруг грубого маршрута. Если консервативное уменьшение закрыло
+        узкий проход, пробуются уровни factor // 2, ... и в конце обычный A*.
+        
+        Путь может быть длиннее оптимального: проходы уже примерно 2 * factor
+        клеток на грубом уровне закрыты, и грубый маршрут их объезжает.
+        factor = 2 даёт почти оптимальные пути, большие коэффициенты быстрее
+        на огромных картах с широкими проходами.
+        
+        Args:
+            start: Стартовая позиция (row, col)
+            end: Конечная позиция (row, col)
+            factor: Во сколько раз уменьшается карта на первом уровне
+            corridor: Запас в блоках вокруг грубого маршрута
+            
+        Returns:
+            Optional[List[Tuple[int, int]]]: Список позиций от start до end или None если путь не найден
+        """
+        if not (self.is_valid_position(*start) and self.is_valid_position(*end)):
+            return None
+        
+        while factor >= 2:
+            route = self._coarse_route(start, end, factor)
+            if route is not None:
+                allowed = self._corridor_cells(route, factor, corridor)
+                path = self._astar_search(start, end, allowed_cells=allowed)
+                if path is not None:
+                    return path
+            factor //= 2
+        
+        return self._astar_search(start, end)
+    
+    def _pyramid_level(self, factor: int) -> 'RobotPathFinder':
+        """
+        Уровень пирамиды - поиск по карте, уменьшенной в factor раз.
+        Кэшируется; при изменении карты пересчитываются только затронутые
+        блоки (если журнал изменений ещё хранит их), иначе уровень строится
+        заново.
+        """
+        cached = self._pyramid.get(factor)
+        if cached is not None:
+            version, level = cached
+            if version == self.grid_version:
+                return level
+            changed = self._changes_since(version)
+            if changed is not None:
+                blocked = self._pool_blocks(factor)
+                blocks = {(r // factor, c // factor)
+                          for r, c in self._affected_positions(changed)}
+                level.update_cells({(r, c): int(blocked[r, c]) for r, c in blocks
+                                    if r < level.rows and c < level.cols})
+                self._pyramid[factor] = (self.grid_version, level)
+                return level
+        
+        level = RobotPathFinder(self._pool_blocks(factor).astype(int).tolist(),
+                                allow_diagonal=self.allow_diagonal)
+        self._pyramid[factor] = (self.grid_version, level)
+        return level
+    
+    def _pool_blocks(self, factor: int) -> np.ndarray:
+        """Маска занятых блоков factor x factor: блок занят, если в нём есть недопустимая позиция"""
+        valid = self.valid_position_mask()
+        rows = -(-self.rows // factor)
+        cols = -(-self.cols // factor)
+        # Клетки за краем карты не мешают: робот туда всё равно не попадёт
+        padded = np.ones((rows * factor, cols * factor), dtype=bool)
+        padded[:self.rows, :self.cols] = valid
+        return ~padded.reshape(rows, factor, cols, factor).all(axis=(1, 3))
+    
+    def _coarse_route(self, start: Tuple[int, int], end: Tuple[int, int],
+                      factor: int) -> Optional[List[Tuple[int, int]]]:
+        """Маршрут по уровню пирамиды между блоками, содержащими start и end"""
+        level = self._pyramid_level(factor)
+        start_block = (start[0] // factor, start[1] // factor)
+        end_block = (end[0] // factor, end[1] // factor)
+        
+        # Блоки старта и финиша на время поиска считаем свободными:
+        # у стены они почти всегда заняты консервативным уменьшением
+        saved = {block: level.matrix[block[0]][block[1]] for block in (start_block, end_block)}
+        try:
+            for r, c in saved:
+                level.matrix[r][c] = 0
+            return level._astar_search(start_block, end_block)
+        finally:
+            for (r, c), value in saved.items():
+                level.matrix[r][c] = value
+    
+    def _corridor_cells(self, route: List[Tuple[int, int]], factor: int,
+                        corridor: int) -> Set[Tuple[int, int]]:
+        """Позиции полной карты в блоках не дальше corridor от грубого маршрута"""
+        rows = -(-self.rows // factor)
+        cols = -(-self.cols // factor)
+        blocks = np.zeros((rows, cols), dtype=bool)
+        for r, c in route:
+            blocks[max(r - corridor, 0):r + corridor + 1,
+                   max(c - corridor, 0):c + corridor + 1] = True
+        cells = np.repeat(np.repeat(blocks, factor, axis=0), factor, axis=1)
+        cells = cells[:self.rows, :self.cols] & self.valid_position_mask()
+        rr, cc = np.nonzero(cells)
+        return set(zip(rr.tolist(), cc.tolist()))
+    
+    def path_cost(self, path: List[Tuple[int, int]]) -> float:
+        """Стоимость пути в той же метрике, что использует поиск (с учётом штрафов)"""
+        return sum(self._move_cost(path[i], path[i + 1]) for i in range(len(path) - 1))
+    
+    def find_k_shortest_paths(self, start: Tuple[int, int],
+                              end: Tuple[int, int],
+                              k: int = 3) -> List[List[Tuple[int, int]]]:
+        """
+        Поиск k кратчайших путей без циклов (алгоритм Йена) на основе A*
+        
+        Найденные маршруты кэшируются по (start, end, версия карты): если
+        основной проход занят, запасной маршрут берётся из кэша мгновенно,
+        а запрос большего k продолжает поиск с того места, где он остановился.
+        
+        Args:
+            start: Стартовая позиция (row, col)
+            end: Конечная позиция (row, col)
+            k: Сколько маршрутов нужно
+            
+        Returns:
+            List[List[Tuple[int, int]]]: До k путей по возрастанию стоимости
+        """
+        key = (start, end, self.grid_version)
+        state = self._route_cache.get(key)
+        if state is None:
+            # Маршруты для старых версий карты больше не нужны
+            for old_key in [old for old in self._route_cache if old[2] != self.grid_version]:
+                del self._route_cache[old_key]
+            if len(self._route_cache) >= self.MAX_ROUTE_CACHE:
+                del self._route_cache[next(iter(self._route_cache))]
+            
+            first = None
+            if self.is_valid_position(*start) and self.is_valid_position(*end):
+                first = self._astar_search(start, end)
+            state = {
+                'paths': [first] if first else [],
+                'candidates': [],       # куча (стоимость, путь)
+                'seen': {tuple(first)} if first else set(),
+                'exhausted': first is None,
+            }
+            self._route_cache[key] = state
+        
+        paths = state['paths']
+        candidates = state['candidates']
+        seen = state['seen']
+        
+        while len(paths) < k and not state['exhausted']:
+            previous = paths[-1]
+            for i in range(len(previous) - 1):
+                spur = previous[i]
+                root = previous[:i + 1]
+                
+                # Запрещаем шаги, которыми уже найденные пути уходят из spur
+                banned_moves = {(p[i], p[i + 1]) for p in paths
+                                if len(p) > i + 1 and p[:i + 1] == root}
+                # и клетки корня, чтобы путь оставался без циклов
+                banned_cells = set(root[:-1])
+                
+                spur_path = self._astar_search(spur, end, banned_cells, banned_moves)
+                if spur_path is None:
+                    continue
+                candidate = root[:-1] + spur_path
+                if tuple(candidate) not in seen:
+                    seen.add(tuple(candidate))
+                    heapq.heappush(candidates, (self.path_cost(candidate), candidate))
+            
+            if not candidates:
+                state['exhausted'] = True
+                break
+            paths.append(heapq.heappop(candidates)[1])
+        
+        return [path[:] for path in paths[:k]]
+    
+    def find_path_timed(self, start: Tuple[int, int],
+                        end: Tuple[int, int],
+                        schedule: Dict[Tuple[int, int], List[Tuple[float, float]]],
+                        start_time: float = 0.0,
+                        step_time: float = 1.0) -> Optional[List[Tuple[Tuple[int, int], float]]]:
+        """
+        Планирование с учётом расписания: двери, лифты и зоны погрузки
+        заблокированы в известные интервалы времени
+        
+        Поиск идёт в пространстве (клетка, время) по безопасным интервалам
+        (SIPP): состояние - клетка и интервал, когда она свободна, значение -
+        самое раннее время прибытия. Робот может ждать на месте.
+        Клетка должна быть свободна с момента, когда робот начинает в неё
+        въезжать, и до его отъезда; на цели робот остаётся навсегда, поэтому
+        прибытие засчитывается только в последний (бесконечный) интервал.
+        
+        Args:
+            start: Стартовая позиция (row, col)
+            end: Конечная позиция (row, col)
+            schedule: Словарь {(row, col): [(t_from, t_to), ...]} - клетка
+                занята в интервалы [t_from, t_to)
+            start_time: Время старта
+            step_time: Время проезда одной клетки по прямой
+                (диагональ - в 1.414 раза дольше)
+            
+        Returns:
+            Optional[List[Tuple[Tuple[int, int], float]]]: Список (позиция, время):
+                время прибытия в клетку; две подряд записи с одной клеткой
+                означают ожидание до указанного времени. None если пути нет
+        """
+        if not (self.is_valid_position(*start) and self.is_valid_position(*end)):
+            return None
+        
+        inf = float('inf')
+        
+        # Занятые интервалы для позиций робота с учётом его размера
+        unsafe: Dict[Tuple[int, int], List[Tuple[float, float]]] = {}
+        for cell, intervals in schedule.items():
+            for position in self._affected_positions([cell]):
+                unsafe.setdefault(position, []).extend(
+                    (float(t_from), float(t_to)) for t_from, t_to in intervals)
+        
+        safe_cache: Dict[Tuple[int, int], List[Tuple[float, float]]] = {}
+        
+        def safe_intervals(position: Tuple[int, int]) -> List[Tuple[float, float]]:
+            """Безопасные интервалы [s, e) позиции - промежутки между занятыми"""
+            intervals = safe_cache.get(position)
+            if intervals is None:
+                intervals = []
+                free_from = -inf
+                for t_from, t_to in sorted(unsafe.get(position, ())):
+                    if t_from > free_from:
+                        intervals.append((free_from, t_from))
+                    free_from = max(free_from, t_to)
+                intervals.append((free_from, inf))
+                safe_cache[position] = intervals
+            return intervals
+        
+        def heuristic(a: Tuple[int, int]) -> float:
+            if self.allow_diagonal:
+                return ((a[0] - end[0])**2 + (a[1] - end[1])**2) ** 0.5 * step_time
+            return (abs(a[0] - end[0]) + abs(a[1] - end[1])) * step_time
+        
+        start_index = next((i for i, (s_from, s_to) in enumerate(safe_intervals(start))
+                            if s_from <= start_time < s_to), None)
+        if start_index is None:
+            return None  # стартовая клетка занята в момент старта
+        
+        start_state = (start, start_index)
+        arrival = {start_state: start_time}
+        came_from = {start_state: None}  # состояние -> (предыдущее, время отъезда)
+        open_set = [(start_time + heuristic(start), start_time, start, start_index)]
+        closed = set()
+        counts = self._expansion_counts
+        
+        while open_set:
+            _, time_now, current_pos, index = heapq.heappop(open_set)
+            state = (current_pos, index)
+            if state in closed:
+                continue
+            closed.add(state)
+            if counts is not None:
+                counts[current_pos[0] * self.cols + current_pos[1]] += 1
+            
+            interval_end = safe_intervals(current_pos)[index][1]
+            if current_pos == end and interval_end == inf:
+                return self._timed_path(came_from, arrival, state)
+            
+            for neighbor in self.get_neighbors(*current_pos):
+                duration = step_time * (1.414 if neighbor[0] != current_pos[0]
+                                        and neighbor[1] != current_pos[1] else 1.0)
+                for j, (s_from, s_to) in enumerate(safe_intervals(neighbor)):
+                    if s_from >= interval_end:
+                        break  # дальше интервалы начинаются после того, как нам пора уехать
+                    depart = max(time_now, s_from)
+                    if depart >= interval_end or depart + duration >= s_to:
+                        continue
+                    next_state = (neighbor, j)
+                    new_arrival = depart + duration
+                    if next_state in closed or new_arrival >= arrival.get(next_state, inf):
+                        continue
+                    arrival[next_state] = new_arrival
+                    came_from[next_state] = (state, depart)
+                    heapq.heappush(open_set, (new_arrival + heuristic(neighbor),
+                                              new_arrival, neighbor, j))
         
         return None
     
+    def _timed_path(self, came_from: dict, arrival: dict, state) -> List[Tuple[Tuple[int, int], float]]:
+        """Восстановление пути со временем по цепочке состояний SIPP"""
+        timed_path = []
+        while state is not None:
+            position = state[0]
+            previous = came_from[state]
+            timed_path.append((position, arrival[state]))
+            if previous is None:
+                break
+            previous_state, depart = previous
+            if depart > arrival[previous_state]:
+                timed_path.append((previous_state[0], depart))  # ожидание на месте
+            state = previous_state
+        timed_path.reverse()
+        return timed_path
+    
+    def plan_coverage(self, start: Optional[Tuple[int, int]] = None,
+                      turn_weight: float = 1.0) -> Optional[List[Tuple[int, int]]]:
+        """
+        Планирование покрытия всей свободной площади (обход для инспекции пола)
+        
+        Свободное пространство разбивается на ячейки бустрофедона: полосы
+        свободных клеток в соседних столбцах (или строках) объединяются в одну
+        ячейку, пока связность не меняется. Каждая ячейка проходится змейкой,
+        следующей берётся ячейка с ближайшим входом (ограниченный поиск в
+        ширину от текущей позиции, вдали - соседка по графу смежности
+        ячеек). Строятся
+        оба варианта (проходы по столбцам и по строкам) и выбирается тот,
+        у которого меньше длина пути плюс turn_weight за каждый поворот.
+        
+        Args:
+            start: Стартовая позиция (по умолчанию - первая свободная клетка)
+            turn_weight: Стоимость одного поворота в клетках пути
+            
+        Returns:
+            Optional[List[Tuple[int, int]]]: Единый путь, проходящий через все
+            достижимые из start позиции, или None если старт недопустим
+        """
+        valid = self.valid_position_mask()
+        if start is None:
+            free = np.argwhere(valid)
+            if not len(free):
+                return None
+            start = (int(free[0][0]), int(free[0][1]))
+        if not self.is_valid_position(*start):
+            return None
+        
+        best, best_cost = None, float('inf')
+        for transpose in (False, True):
+            path = self._plan_boustrophedon(valid, start, transpose, turn_weight)
+            cost = len(path) + turn_weight * self.count_turns(path)
+            if cost < best_cost:
+                best, best_cost = path, cost
+        return best
+    
+    @staticmethod
+    def count_turns(path: List[Tuple[int, int]]) -> int:
+        """Число поворотов (смен направления) на пути"""
+        turns = 0
+        for i in range(1, len(path) - 1):
+            d1 = (path[i][0] - path[i - 1][0], path[i][1] - path[i - 1][1])
+            d2 = (path[i + 1][0] - path[i][0], path[i + 1][1] - path[i][1])
+            if d1 != d2:
+                turns += 1
+        return turns
+    
+    def _plan_boustrophedon(self, valid: np.ndarray, start: Tuple[int, int],
+                            transpose: bool, turn_weight: float = 1.0) -> List[Tuple[int, int]]:
+        """
+        Покрытие змейкой по столбцам (transpose=True - по строкам)
+        
+        Returns:
+            List[Tuple[int, int]]: Путь в координатах карты
+        """
+        grid = valid.T if transpose else valid
+        
+        def to_map(sweep: int, pos: int) -> Tuple[int, int]:
+            # В системе координат развёртки: sweep - номер столбца, pos - строка
+            return (sweep, pos) if transpose else (pos, sweep)
+        
+        # 1. Полосы свободных клеток в каждом столбце (векторно через diff)
+        padded = np.zeros((grid.shape[0] + 2, grid.shape[1]), dtype=np.int8)
+        padded[1:-1] = grid
+        edges = np.diff(padded, axis=0)
+        segments = []
+        for c in range(grid.shape[1]):
+            begins = np.flatnonzero(edges[:, c] == 1)
+            ends = np.flatnonzero(edges[:, c] == -1) - 1
+            segments.append(list(zip(begins.tolist(), ends.tolist())))
+        
+        # 2. Декомпозиция: полоса продолжает ячейку, если перекрывается ровно
+        #    с одной полосой предыдущего столбца и та - только с ней
+        cells = []            # ячейка - список (столбец, начало, конец)
+        previous_cells = []   # номер ячейки для полос предыдущего столбца
+        for c, column in enumerate(segments):
+            previous = segments[c - 1] if c else []
+            overlaps_prev = [[j for j, (pa, pb) in enumerate(previous) if pa <= b and a <= pb]
+                             for a, b in column]
+            overlap_count = [0] * len(previous)
+            for links in overlaps_prev:
+                for j in links:
+                    overlap_count[j] += 1
+            current_cells = []
+            for (a, b), links in zip(column, overlaps_prev):
+                if len(links) == 1 and overlap_count[links[0]] == 1:
+                    cell_id = previous_cells[links[0]]
+                else:
+                    cell_id = len(cells)
+                    cells.append([])
+                cells[cell_id].append((c, a, b))
+                current_cells.append(cell_id)
+            previous_cells = current_cells
+        
+        # 3. Два варианта: как есть и с ячейками из одной полосы,
+        #    присоединёнными к соседним. Присоединение убирает переезды
+        #    к мелким ячейкам, но заставляет проходить их сразу, что иногда
+        #    даёт возвраты по уже пройденной полосе - берём лучший вариант
+        passable = np.pad(valid, 1).astype(np.uint8).tobytes()
+        best, best_cost = None, float('inf')
+        for variant in (cells, self._merge_single_strips(cells)):
+            path = self._sweep_cells(variant, start, to_map, passable)
+            cost = len(path) + turn_weight * self.count_turns(path)
+            if cost < best_cost:
+                best, best_cost = path, cost
+        return best
+    
+    @staticmethod
+    def _merge_single_strips(cells: List[list]) -> List[list]:
+        """
+        Присоединение ячеек из одной полосы к соседней ячейке: к той, что
+        кончается в предыдущем столбце, или к той, что начинается в следующем,
+        если полосы перекрываются
+        """
+        cells = [list(cell) for cell in cells]
+        by_last = {}    # столбец последней полосы -> ячейки
+        by_first = {}   # столбец первой полосы -> ячейки
+        for cell_id, cell in enumerate(cells):
+            by_last.setdefault(cell[-1][0], []).append(cell_id)
+            by_first.setdefault(cell[0][0], []).append(cell_id)
+        
+        def overlaps(x, y):
+            return x[1] <= y[2] and y[1] <= x[2]
+        
+        for cell_id, cell in enumerate(cells):
+            if len(cell) != 1:
+                continue
+            strip = cell[0]
+            c = strip[0]
+            target = next((other for other in by_last.get(c - 1, ())
+                           if other != cell_id and overlaps(cells[other][-1], strip)), None)
+            if target is not None:
+                cells[target].append(strip)
+                by_last[c - 1].remove(target)
+                by_last.setdefault(c, []).append(target)
+            else:
+                target = next((other for other in by_first.get(c + 1, ())
+                               if other != cell_id and overlaps(cells[other][0], strip)), None)
+                if target is None:
+                    continue
+                cells[target].insert(0, strip)
+                by_first[c + 1].remove(target)
+                by_first.setdefault(c, []).append(target)
+            by_last[c].remove(cell_id)
+            by_first[c].remove(cell_id)
+            cells[cell_id] = None
+        return [cell for cell in cells if cell is not None]
+    
+    def _cell_adjacency(self, cells: List[list]) -> List[Set[int]]:
+        """
+        Граф смежности ячеек: ячейки соседние, если их полосы в соседних
+        столбцах перекрываются (при диагональном движении - касаются углом).
+        Полосы столбца не пересекаются и упорядочены, поэтому пары ищутся
+        слиянием за линейное время.
+        """
+        touch = 1 if self.allow_diagonal else 0
+        columns: Dict[int, list] = {}
+        for cell_id, cell in enumerate(cells):
+            for c, a, b in cell:
+                columns.setdefault(c, []).append((a, b, cell_id))
+        adjacent = [set() for _ in cells]
+        for c, left in columns.items():
+            right = columns.get(c + 1)
+            if not right:
+                continue
+            left.sort()
+            right.sort()
+            i = j = 0
+            while i < len(left) and j < len(right):
+                a1, b1, id1 = left[i]
+                a2, b2, id2 = right[j]
+                if a1 <= b2 + touch and a2 <= b1 + touch and id1 != id2:
+                    adjacent[id1].add(id2)
+                    adjacent[id2].add(id1)
+                if b1 < b2:
+                    i += 1
+                else:
+                    j += 1
+        return adjacent
+    
+    def _sweep_cells(self, cells: List[list], start: Tuple[int, int],
+                     to_map: Callable[[int, int], Tuple[int, int]],
+                     passable: bytes) -> List[Tuple[int, int]]:
+        """
+        Обход ячеек змейкой с переездами между ними
+        
+        Следующей берётся ячейка с ближайшим входом: волна от текущей позиции
+        просматривает не больше COVERAGE_SEARCH_LIMIT позиций. Если рядом
+        непройденных ячеек нет, берётся непройденная соседка по графу
+        смежности последней ячейки, у которой такие ещё остались, и переезд
+        к ней ищется A*. Так поздние волны не проходят всю карту заново.
+        
+        Args:
+            passable: Маска допустимых позиций с рамкой из недопустимых
+                шириной в клетку, построчно (rows + 2) x (cols + 2) байт
+        """
+        rows, cols = self.rows, self.cols
+        width = cols + 2
+        offsets = [dr * width + dc for dr, dc in self.directions]
+        diagonal = self.allow_diagonal
+        
+        def index(position: Tuple[int, int]) -> int:
+            return (position[0] + 1) * width + position[1] + 1
+        
+        def distance(i: int, j: int) -> int:
+            dr, dc = abs(i // width - j // width), abs(i % width - j % width)
+            return max(dr, dc) if diagonal else dr + dc
+        
+        # Метка поиска и предшественник по позициям: массивы общие для всех
+        # поисков, чтобы не заводить словари на каждый шаг
+        stamp = array('I', [0]) * len(passable)
+        parent = array('i', [-1]) * len(passable)
+        search = 1
+        
+        # Позиции, достижимые из старта: ячейки других компонент пропускаются
+        home = index(start)
+        stamp[home] = search
+        queue = deque([home])
+        while queue:
+            i = queue.popleft()
+            for offset in offsets:
+                j = i + offset
+                if passable[j] and stamp[j] != search:
+                    stamp[j] = search
+                    queue.append(j)
+        
+        # Входы в ячейку: концы первой полосы при обходе в обе стороны
+        entries = []
+        owners: Dict[int, list] = {}
+        has_entry = bytearray(len(passable))
+        remaining = set()
+        for cell_id, cell in enumerate(cells):
+            options = []
+            for strips in (cell, cell[::-1]):
+                c, a, b = strips[0]
+                for entry in (a, b):
+                    option = (index(to_map(c, entry)), strips, entry)
+                    options.append(option)
+                    owners.setdefault(option[0], []).append((cell_id, option))
+                    has_entry[option[0]] = 1
+            entries.append(options)
+            if stamp[options[0][0]] == search:
+                remaining.add(cell_id)
+        adjacent = self._cell_adjacency(cells)
+        
+        def route(here: int, goal: int) -> List[int]:
+            # Восстановление переезда по предшественникам (без here)
+            steps = []
+            while goal != here:
+                steps.append(goal)
+                goal = parent[goal]
+            steps.reverse()
+            return steps
+        
+        def transit(here: int, goal: int) -> List[int]:
+            # A* с единичными шагами по маске (переезд по уже пройденным клеткам)
+            nonlocal search
+            search += 1
+            stamp[here] = search
+            g_scores = {here: 0}
+            open_set = [(distance(here, goal), 0, here)]
+            while open_set:
+                _, g, i = heapq.heappop(open_set)
+                if i == goal:
+                    break
+                if g > g_scores[i]:
+                    continue
+                for offset in offsets:
+                    j = i + offset
+                    if passable[j] and (stamp[j] != search or g + 1 < g_scores[j]):
+                        stamp[j] = search
+                        g_scores[j] = g + 1
+                        parent[j] = i
+                        heapq.heappush(open_set, (g + 1 + distance(j, goal), g + 1, j))
+            return route(here, goal)
+        
+        path = [start]
+        here = home
+        stack: List[int] = []
+        limit = self.COVERAGE_SEARCH_LIMIT
+        
+        def entry_at(i: int):
+            # Непройденная ячейка с входом в позиции i (меньший номер) или None
+            found = None
+            for cell_id, option in owners[i]:
+                if cell_id in remaining and (found is None or cell_id < found[0]):
+                    found = (cell_id, option)
+            if found is None:
+                has_entry[i] = 0
+            return found
+        
+        while remaining:
+            # Ближайший вход волной от текущей позиции. Позиции извлекаются
+            # в порядке добавления, поэтому вход проверяется сразу при добавлении
+            search += 1
+            stamp[here] = search
+            found = entry_at(here) if has_entry[here] else None
+            queue = deque([here])
+            expanded = 0
+            while queue and not found and expanded < limit:
+                i = queue.popleft()
+                expanded += 1
+                for offset in offsets:
+                    j = i + offset
+                    if passable[j] and stamp[j] != search:
+                        stamp[j] = search
+                        parent[j] = i
+                        if has_entry[j]:
+                            found = entry_at(j)
+                            if found:
+                                break
+                        queue.append(j)
+            if found is not None:
+                cell_id, (target, strips, entry) = found
+                steps = route(here, target)
+            else:
+                # Рядом ничего нет - непройденная соседка последней ячейки
+                # по графу смежности, у которой такие ещё есть
+                candidates = None
+                while stack:
+                    candidates = [cell_id for cell_id in adjacent[stack[-1]]
+                                  if cell_id in remaining]
+                    if candidates:
+                        break
+                    stack.pop()
+                _, cell_id, (target, strips, entry) = min(
+                    (distance(here, option[0]), cell_id, option)
+                    for cell_id in candidates or remaining for option in entries[cell_id])
+                steps = transit(here, target)
+            path.extend((i // width - 1, i % width - 1) for i in steps)
+            remaining.discard(cell_id)
+            stack.append(cell_id)
+            
+            def walk(c: int, r_from: int, r_to: int):
+                # Движение вдоль столбца c от r_from (не включая) до r_to
+                step = 1 if r_to > r_from else -1
+                path.extend(to_map(c, r) for r in range(r_from + step, r_to + step, step))
+            
+            position = entry
+            for i, (c, a, b) in enumerate(strips):
+                if i:
+                    # Переход в соседний столбец через перекрытие полос
+                    crossing = min(max(position, a), b)
+                    walk(strips[i - 1][0], position, crossing)
+                    path.append(to_map(c, crossing))
+                    position = crossing
+                # Доезжаем до ближнего конца полосы и проходим её до дальнего
+                near, far = (a, b) if abs(position - a) <= abs(position - b) else (b, a)
+                walk(c, position, near)
+                walk(c, near, far)
+                position = far
+            here = index(path[-1])
+        
+        return path
+    
+    def _path_violations(self, path: List[Tuple[int, int]]) -> np.ndarray:
+        """
+        Векторная проверка пути: для каждой точки - True, если точка вне карты,
+        робот в ней задевает препятствие или шаг в неё недопустим
+        """
+        points = np.asarray(path, dtype=np.int64).reshape(-1, 2)
+        rows, cols = points[:, 0], points[:, 1]
+        in_bounds = (rows >= 0) & (rows < self.rows) & (cols >= 0) & (cols < self.cols)
+        
+        bad = ~in_bounds
+        bad[in_bounds] = ~self.valid_position_mask()[rows[in_bounds], cols[in_bounds]]
+        
+        if len(points) > 1:
+            dr = np.abs(np.diff(rows))
+            dc = np.abs(np.diff(cols))
+            step_ok = (dr <= 1) & (dc <= 1) & (dr + dc > 0)
+            if not self.allow_diagonal:
+                step_ok &= dr + dc == 1
+            bad[1:] |= ~step_ok
+        return bad
+    
+    def validate_path(self, path: List[Tuple[int, int]]) -> bool:
+        """
+        Проверка, что путь всё ещё можно проехать по текущей карте:
+        непрерывность шагов, границы карты и свободное место под робота
+        с учётом robot_size - одним векторным проходом по всему пути
+        
+        Args:
+            path: Путь в виде списка позиций
+            
+        Returns:
+            bool: True если путь допустим, False в противном случае
+        """
+        if not path:
+            return False
+        return not self._path_violations(path).any()
+    
+    def first_invalid_index(self, path: List[Tuple[int, int]]) -> Optional[int]:
+        """
+        Индекс первой недопустимой точки пути (None если путь допустим)
+        
+        Args:
+            path: Путь в виде списка позиций
+            
+        Returns:
+            Optional[int]: Номер точки, до которой путь ещё можно проехать
+        """
+        bad = np.flatnonzero(self._path_violations(path))
+        return int(bad[0]) if len(bad) else None
+    
+    def register_path(self, path_id, path: List[Tuple[int, int]]):
+        """
+        Регистрация активного маршрута в обратном индексе клетка -> маршруты,
+        чтобы изменение карты сразу сообщало, какие маршруты затронуты
+        
+        Args:
+            path_id: Идентификатор маршрута (например, id робота или чата)
+            path: Путь маршрута
+        """
+        self.unregister_path(path_id)
+        self.active_paths[path_id] = path
+        for cell in self._footprint_cells(path):
+            self._path_index.setdefault(cell, set()).add(path_id)
+    
+    def unregister_path(self, path_id):
+        """Удаление маршрута из обратного индекса"""
+        path = self.active_paths.pop(path_id, None)
+        if path is None:
+            return
+        for cell in self._footprint_cells(path):
+            ids = self._path_index.get(cell)
+            if ids is not None:
+                ids.discard(path_id)
+                if not ids:
+                    del self._path_index[cell]
+        self.invalidated_paths.discard(path_id)
+    
+    def affected_paths(self, cells) -> Set[object]:
+        """
+        Маршруты, проходящие через заданные клетки карты - за O(числа клеток)
+        
+        Args:
+            cells: Изменённые клетки карты
+            
+        Returns:
+            Set[object]: Идентификаторы затронутых маршрутов
+        """
+        affected = set()
+        for cell in cells:
+            ids = self._path_index.get(cell)
+            if ids:
+                affected |= ids
+        return affected
+    
+    def pop_invalidated_paths(self) -> Set[object]:
+        """Маршруты, перекрытые новыми препятствиями с прошлого вызова"""
+        invalidated = self.invalidated_paths
+        self.invalidated_paths = set()
+        return invalidated
+    
+    def _footprint_cells(self, path: List[Tuple[int, int]]) -> Set[Tuple[int, int]]:
+        """Клетки карты, которые робот занимает при движении по пути"""
+        return {(row + dr, col + dc)
+                for row, col in path
+                for dr in range(self.robot_size)
+                for dc in range(self.robot_size)}
+    
+    def find_nearest(self, start: Tuple[int, int],
+                     targets: List[Tuple[int, int]],
+                     k: Optional[int] = None):
+        """
+        Поиск ближайшей цели из нескольких за один проход (алгоритм Дейкстры
+        от start, остановка на первой достигнутой цели)
+        
+        Args:
+            start: Стартовая позиция (row, col)
+            targets: Список целей, например свободные доки или точки погрузки
+            k: Если задано - вернуть до k ближайших целей с расстояниями
+            
+        Returns:
+            k не задано: Optional[List[Tuple[int, int]]] - путь от start до
+                ближайшей цели (цель - последний элемент) или None
+            k задано: List[Tuple[Tuple[int, int], float]] - до k пар
+                (цель, расстояние) по возрастанию расстояния
+        """
+        remaining = {t for t in targets if self.is_valid_position(*t)}
+        want = 1 if k is None else min(k, len(remaining))
+        found = []
+        
+        if not self.is_valid_position(*start) or want <= 0:
+            return None if k is None else found
+        
+        open_set = [(0.0, start)]
+        dist = {start: 0.0}
+        came_from = {start: None}
+        visited = set()
+        counts = self._expansion_counts
+        
+        while open_set:
+            d, current_pos = heapq.heappop(open_set)
+            if current_pos in visited:
+                continue
+            visited.add(current_pos)
+            if counts is not None:
+                counts[current_pos[0] * self.cols + current_pos[1]] += 1
+            
+            if current_pos in remaining:
+                remaining.discard(current_pos)
+                found.append((current_pos, d))
+                if len(found) == want:
+                    break
+            
+            for neighbor in self.get_neighbors(*current_pos):
+                if neighbor in visited:
+                    continue
+                new_d = d + self._move_cost(current_pos, neighbor)
+                if neighbor not in dist or new_d < dist[neighbor]:
+                    dist[neighbor] = new_d
+                    came_from[neighbor] = current_pos
+                    heapq.heappush(open_set, (new_d, neighbor))
+        
+        if k is not None:
+            return found
+        if not found:
+            return None
+        
+        # Восстанавливаем путь до ближайшей цели
+        path = []
+        current_pos = found[0][0]
+        while current_pos is not None:
+            path.append(current_pos)
+            current_pos = came_from[current_pos]
+        path.reverse()
+        return path
+    
+    def get_flow_field(self, goal: Tuple[int, int]) -> Optional[FlowField]:
+        """
+        Поле направлений к цели goal (один обратный проход Дейкстры от цели)
+        
+        Поле кэшируется по цели и после изменения карты пересчитывается
+        инкрементально - только в области, затронутой изменёнными клетками.
+        
+        Args:
+            goal: Целевая позиция (row, col), например зона разгрузки
+            
+        Returns:
+            Optional[FlowField]: Поле направлений или None, если цель недоступна
+        """
+        if not self.is_valid_position(*goal):
+            return None
+        
+        field = self._flow_fields.get(goal)
+        if field is None:
+            if len(self._flow_fields) >= self.MAX_FLOW_FIELDS:
+                # Вытесняем самое старое поле
+                del self._flow_fields[next(iter(self._flow_fields))]
+            field = FlowField(goal, self.rows, self.cols, self.directions)
+            self._flow_fields[goal] = field
+            self._build_flow_field(field)
+        elif field.version != self.grid_version:
+            changes = self._changes_since(field.version)
+            if changes is None or len(changes) * 4 > self.rows * self.cols:
+                self._build_flow_field(field)
+            else:
+                self._refresh_flow_field(field, changes)
+        return field
+    
+    def flow_next_step(self, position: Tuple[int, int],
+                       goal: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        """
+        Следующий шаг робота из position к goal по полю направлений
+        
+        Args:
+            position: Текущая позиция робота (row, col)
+            goal: Целевая позиция (row, col)
+            
+        Returns:
+            Optional[Tuple[int, int]]: Следующая клетка или None
+        """
+        field = self.get_flow_field(goal)
+        return field.next_step(*position) if field else None
+    
+    def _build_flow_field(self, field: FlowField):
+        """Полный расчёт поля направлений"""
+        inf = float('inf')
+        for i in range(len(field.distances)):
+            field.distances[i] = inf
+            field.next_dir[i] = -1
+        goal = field.goal
+        field.distances[goal[0] * self.cols + goal[1]] = 0.0
+        field.version = self.grid_version
+        self._propagate_flow_field(field, [(0.0, goal)])
+    
+    def _refresh_flow_field(self, field: FlowField, cells: Set[Tuple[int, int]]):
+        """
+        Инкрементальный пересчёт поля направлений после изменения клеток
+        
+        Клетки, чей путь к цели проходил через ставшие занятыми позиции,
+        сбрасываются и заново получают расстояния от соседей на границе;
+        освободившиеся позиции распространяют возможные сокращения пути.
+        """
+        inf = float('inf')
+        cols = self.cols
+        dist = field.distances
+        next_dir = field.next_dir
+        directions = self.directions
+        field.version = self.grid_version
+        
+        if not self.is_valid_position(*field.goal):
+            self._build_flow_field(field)
+            return
+        
+        if self.clearance_weight:
+            # Зазор меняется до clearance_radius клеток от изменённых, вместе
+            # с ним - штраф любого шага, касающегося этой области. Стоимость
+            # могла вырасти и у допустимых позиций, поэтому сбрасываются все
+            # позиции области и все, чей путь к цели через неё проходил
+            affected = self._affected_positions(
+                self._widen_cells(cells, max(1, self.clearance_radius)))
+            stack = [p for p in affected
+                     if p[0] < self.rows and p[1] < cols
+                     and dist[p[0] * cols + p[1]] < inf and p != field.goal]
+        else:
+            affected = self._affected_positions(cells)
+            stack = [p for p in affected
+                     if p[0] < self.rows and p[1] < cols
+                     and dist[p[0] * cols + p[1]] < inf
+                     and not self.is_valid_position(*p)]
+        
+        # 1. Сбрасываем затронутые позиции и всех, кто шёл через них
+        seen = set(stack)
+        reset = []
+        while stack:
+            current_pos = stack.pop()
+            reset.append(current_pos)
+            idx = current_pos[0] * cols + current_pos[1]
+            dist[idx] = inf
+            next_dir[idx] = -1
+            for k, (dr, dc) in enumerate(directions):
+                # Клетка, из которой шаг в направлении k ведёт в current_pos
+                r, c = current_pos[0] - dr, current_pos[1] - dc
+                if (0 <= r < self.rows and 0 <= c < cols and (r, c) not in seen
+                        and next_dir[r * cols + c] == k):
+                    seen.add((r, c))
+                    stack.append((r, c))
+        
+        # 2. Новые расстояния для сброшенных и освободившихся позиций
+        open_set = []
+        candidates = reset + [p for p in affected if p not in seen]
+        for current_pos in candidates:
+            if not self.is_valid_position(*current_pos):
+                continue
+            idx = current_pos[0] * cols + current_pos[1]
+            best, best_k = dist[idx], next_dir[idx]
+            for k, neighbor in self._neighbors_with_directions(current_pos):
+                d = dist[neighbor[0] * cols + neighbor[1]]
+                d += self._move_cost(current_pos, neighbor)
+                if d < best:
+                    best, best_k = d, k
+            if best < dist[idx]:
+                dist[idx] = best
+                next_dir[idx] = best_k
+            if best < inf:
+                heapq.heappush(open_set, (best, current_pos))
+        
+        # 3. Распространяем изменения
+        self._propagate_flow_field(field, open_set)
+    
+    def _widen_cells(self, cells, radius: int) -> Set[Tuple[int, int]]:
+        """Клетки карты не дальше radius (по Чебышёву) от данных клеток"""
+        widened = set()
+        for row, col in cells:
+            for r in range(max(0, row - radius), min(self.rows, row + radius + 1)):
+                for c in range(max(0, col - radius), min(self.cols, col + radius + 1)):
+                    widened.add((r, c))
+        return widened
+    
+    def _neighbors_with_directions(self, position: Tuple[int, int]):
+        """Допустимые соседи позиции вместе с индексом направления шага к ним"""
+        row, col = position
+        for k, (dr, dc) in enumerate(self.directions):
+            if self.is_valid_position(row + dr, col + dc):
+                yield k, (row + dr, col + dc)
+    
+    def _propagate_flow_field(self, field: FlowField, open_set: list):
+        """Алгоритм Дейкстры от клеток open_set с записью направлений к цели"""
+        cols = self.cols
+        dist = field.distances
+        next_dir = field.next_dir
+        # Индекс обратного направления: шаг соседа назад в текущую клетку
+        opposite = [self.directions.index((-dr, -dc)) for dr, dc in self.directions]
+        counts = self._expansion_counts
+        
+        while open_set:
+            d, current_pos = heapq.heappop(open_set)
+            if d > dist[current_pos[0] * cols + current_pos[1]]:
+                continue
+            if counts is not None:
+                counts[current_pos[0] * cols + current_pos[1]] += 1
+            for k, neighbor in self._neighbors_with_directions(current_pos):
+                new_d = d + self._move_cost(current_pos, neighbor)
+                idx = neighbor[0] * cols + neighbor[1]
+                if new_d < dist[idx]:
+                    dist[idx] = new_d
+                    next_dir[idx] = opposite[k]
+                    heapq.heappush(open_set, (new_d, neighbor))
+    
     def find_path_through_points(self, points: List[Tuple[int, int]],
                                 method: str = 'astar') -> Optional[List[Tuple[int, int]]]:
         """
@@ -174,7 +1942,7 @@ class RobotPathFinder:
         
         Args:
             points: Список точек для посещения в порядке [p1, p2, p3, ...]
-            method: Метод поиска ('bfs' или 'astar')
+            method: Метод поиска ('bfs', 'astar', 'ida' или 'multires')
             
         Returns:
             Optional[List[Tuple[int, int]]]: Полный путь через все точки или None если путь не найден
@@ -191,6 +1959,10 @@ class RobotPathFinder:
             # Выбираем метод поиска
             if method.lower() == 'bfs':
                 segment_path = self.find_path_bfs(current_point, next_point)
+            elif method.lower() == 'ida':
+                segment_path = self.find_path_ida(current_point, next_point)
+            elif method.lower() == 'multires':
+                segment_path = self.find_path_multires(current_point, next_point)
             else:
                 segment_path = self.find_path_astar(current_point, next_point)
             
@@ -239,17 +2011,10 @@ class RobotPathFinder:
         if len(path) < 2:
             return 0
         
-        total_cost = 0
-        for i in range(len(path) - 1):
-            p1, p2 = path[i], path[i + 1]
-            # Расстояние между точками
-            dr, dc = abs(p2[0] - p1[0]), abs(p2[1] - p1[1])
-            if dr == 1 and dc == 1:
-                total_cost += 1.414  # Диагональное движение
-            else:
-                total_cost += 1.0  # Ортогональное движение
-        
-        return total_cost
+        # Шаги между соседними точками (время по шагам - path_metrics.PathMetrics)
+        steps = np.abs(np.diff(np.asarray(path), axis=0))
+        diagonal = (steps[:, 0] == 1) & (steps[:, 1] == 1)
+        return float(np.where(diagonal, 1.414, 1.0).sum())
     
     
     def visualize_path(self, path: List[Tuple[int, int]] = None,
@@ -264,40 +2029,206 @@ class RobotPathFinder:
         Returns:
             str: Строковое представление визуализации пути
         """
-        visualization = []
+        key = ('text', self.grid_version, tuple(path or ()), tuple(points or ()))
+        cached = self._cached_render(key)
+        if cached is not None:
+            return cached
+        
+        # Сетка символов: сначала точки, поверх путь, поверх препятствия -
+        # тот же приоритет, что при проверке каждой клетки по очереди
+        grid = [['. '] * self.cols for _ in range(self.rows)]
+        for r, c in points or ():
+            if 0 <= r < self.rows and 0 <= c < self.cols:
+                grid[r][c] = '★ '
+        for (r, c), symbol in self._path_symbols(path).items():
+            if 0 <= r < self.rows and 0 <= c < self.cols:
+                grid[r][c] = symbol
+        for r, c in zip(*np.nonzero(self.obstacle_mask())):
+            grid[r][c] = '██'
+        
+        visualization = '\n'.join(''.join(row) for row in grid)
+        self._store_render(key, visualization)
+        return visualization
+    
+    def _path_symbols(self, path: List[Tuple[int, int]]) -> Dict[Tuple[int, int], str]:
+        """
+        Символ для каждой клетки пути (индекс клетка -> шаг строится за один
+        проход): S - старт, E - финиш, стрелка - направление следующего шага.
+        Для клетки, пройденной несколько раз, берётся первое посещение.
+        """
+        first_step: Dict[Tuple[int, int], int] = {}
+        for idx, position in enumerate(path or ()):
+            first_step.setdefault(tuple(position), idx)
+        
+        symbols = {}
+        last = len(path) - 1 if path else 0
+        for (r, c), idx in first_step.items():
+            if idx == 0:
+                symbols[(r, c)] = 'S '  # Старт
+            elif idx == last:
+                symbols[(r, c)] = 'E '  # Финиш
+            else:
+                next_pos = path[idx + 1]
+                if next_pos[0] < r: symbols[(r, c)] = '↑ '
+                elif next_pos[0] > r: symbols[(r, c)] = '↓ '
+                elif next_pos[1] < c: symbols[(r, c)] = '← '
+                elif next_pos[1] > c: symbols[(r, c)] = '→ '
+                else: symbols[(r, c)] = '· '
+        return symbols
+    
+    def render_path_png(self, path: List[Tuple[int, int]] = None,
+                        points: List[Tuple[int, int]] = None,
+                        cell_size: int = 8) -> bytes:
+        """
+        Карта с путём в виде компактного PNG (палитра из RENDER_PALETTE),
+        например для bot.send_photo
+        
+        Args:
+            path: Путь робота в виде списка позиций
+            points: Список отмеченных точек
+            cell_size: Размер клетки в пикселях
+            
+        Returns:
+            bytes: Содержимое PNG-файла
+        """
+        from PIL import Image
+        
+        key = ('png', self.grid_version, tuple(path or ()), tuple(points or ()), cell_size)
+        cached = self._cached_render(key)
+        if cached is not None:
+            return cached
         
+        codes = np.zeros((self.rows, self.cols), dtype=np.uint8)
+        for cells, code in ((points, 5), (path, 2)):
+            if cells:
+                cells = np.asarray(cells).reshape(-1, 2)
+                inside = ((cells[:, 0] >= 0) & (cells[:, 0] < self.rows) &
+                          (cells[:, 1] >= 0) & (cells[:, 1] < self.cols))
+                codes[cells[inside, 0], cells[inside, 1]] = code
+        if path:
+            codes[tuple(path[-1])] = 4
+            codes[tuple(path[0])] = 3
+        codes[self.obstacle_mask()] = 1
+        
+        image = Image.fromarray(codes, 'P')
+        image.putpalette([channel for color in self.RENDER_PALETTE for channel in color])
+        if cell_size > 1:
+            image = image.resize((self.cols * cell_size, self.rows * cell_size), Image.NEAREST)
+        buffer = BytesIO()
+        image.save(buffer, format='PNG', optimize=True)
+        png = buffer.getvalue()
+        self._store_render(key, png)
+        return png
+    
+    def save_path_png(self, filename: str, path: List[Tuple[int, int]] = None,
+                      points: List[Tuple[int, int]] = None, cell_size: int = 8):
+        """Сохранение карты с путём в PNG-файл"""
+        with open(filename, 'wb') as f:
+            f.write(self.render_path_png(path, points, cell_size))
+    
+    def _cached_render(self, key):
+        """Готовое изображение из кэша (с отметкой, что оно недавно нужно)"""
+        rendered = self._render_cache.get(key)
+        if rendered is not None:
+            self._render_cache.move_to_end(key)
+        return rendered
+    
+    def _store_render(self, key, rendered):
+        """Сохранение изображения в кэш, старые версии карты и лишнее вытесняются"""
+        for old_key in [old for old in self._render_cache if old[1] != self.grid_version]:
+            del self._render_cache[old_key]
+        self._render_cache[key] = rendered
+        while len(self._render_cache) > self.MAX_RENDER_CACHE:
+            self._render_cache.popitem(last=False)
+    
+    def start_profiling(self):
+        """
+        Включение профилирования поисков: каждый поиск (A*, IDA*, Дейкстра,
+        поля направлений, планирование по расписанию) увеличивает счётчик
+        раскрытий клетки. Повторный вызов обнуляет счётчики.
+        Выключенное профилирование стоит одну проверку на раскрытие.
+        """
+        self._expansion_counts = array('I', [0]) * (self.rows * self.cols)
+    
+    def stop_profiling(self) -> Optional[np.ndarray]:
+        """Выключение профилирования, возвращает накопленную тепловую карту"""
+        heatmap = self.expansion_heatmap()
+        self._expansion_counts = None
+        return heatmap
+    
+    def expansion_heatmap(self) -> Optional[np.ndarray]:
+        """Число раскрытий каждой клетки (rows x cols) или None, если профилирование выключено"""
+        if self._expansion_counts is None:
+            return None
+        return np.frombuffer(self._expansion_counts, dtype=np.uint32).reshape(
+            self.rows, self.cols).copy()
+    
+    def visualize_expansions(self, path: List[Tuple[int, int]] = None) -> str:
+        """
+        Визуализация тепловой карты раскрытий в стиле visualize_path
+        
+        Args:
+            path: Путь робота (старт и финиш отмечаются S и E)
+            
+        Returns:
+            str: Строковое представление: '. ' - клетка не раскрывалась,
+                 '1 '..'9 ' - относительное число раскрытий, '██' - препятствие
+        """
+        heatmap = self.expansion_heatmap()
+        if heatmap is None:
+            heatmap = np.zeros((self.rows, self.cols), dtype=np.uint32)
+        peak = max(int(heatmap.max()), 1)
+        # Уровни 1..9 пропорционально числу раскрытий
+        levels = np.where(heatmap > 0, 1 + (heatmap.astype(np.int64) * 8) // peak, 0)
+        obstacles = self.obstacle_mask()
+        marks = {}
+        if path:
+            marks[path[0]] = 'S '
+            marks[path[-1]] = 'E '
+        
+        visualization = []
         for r in range(self.rows):
             row_str = []
             for c in range(self.cols):
-                cell_value = self.matrix[r][c]
-                
-                # Проверяем, является ли клетка препятствием
-                if cell_value in self.obstacles:
+                if obstacles[r, c]:
                     row_str.append('██')
-                # Проверяем, является ли это точкой пути
-                elif path and (r, c) in path:
-                    idx = path.index((r, c))
-                    if idx == 0:
-                        row_str.append('S ')  # Старт
-                    elif idx == len(path) - 1:
-                        row_str.append('E ')  # Финиш
-                    else:
-                        # Определяем направление движения
-                        prev = path[idx-1] if idx > 0 else (r, c)
-                        next_pos = path[idx+1] if idx < len(path)-1 else (r, c)
-                        
-                        # Отображаем направление
-                        if next_pos[0] < r: row_str.append('↑ ')
-                        elif next_pos[0] > r: row_str.append('↓ ')
-                        elif next_pos[1] < c: row_str.append('← ')
-                        elif next_pos[1] > c: row_str.append('→ ')
-                        else: row_str.append('· ')
-                # Проверяем, является ли это отмеченной точкой
-                elif points and (r, c) in points:
-                    row_str.append('★ ')
+                elif (r, c) in marks:
+                    row_str.append(marks[(r, c)])
+                elif levels[r, c]:
+                    row_str.append(f'{levels[r, c]} ')
                 else:
                     row_str.append('. ')
             visualization.append(''.join(row_str))
         
         return '\n'.join(visualization)
+    
+    def save_expansion_heatmap(self, filename: str, cell_size: int = 8,
+                               path: List[Tuple[int, int]] = None):
+        """
+        Сохранение тепловой карты раскрытий в PNG
+        
+        Args:
+            filename: Имя файла изображения
+            cell_size: Размер клетки в пикселях
+            path: Путь робота, рисуется зелёным поверх тепловой карты
+        """
+        from PIL import Image
+        
+        heatmap = self.expansion_heatmap()
+        if heatmap is None:
+            heatmap = np.zeros((self.rows, self.cols), dtype=np.uint32)
+        heat = heatmap / max(int(heatmap.max()), 1)
+        
+        # Белый - не раскрывалась, от жёлтого к красному - чем больше раскрытий
+        image = np.full((self.rows, self.cols, 3), 255, dtype=np.uint8)
+        expanded = heatmap > 0
+        image[expanded, 1] = (220 * (1 - heat[expanded])).astype(np.uint8)
+        image[expanded, 2] = 0
+        image[self.obstacle_mask()] = (40, 40, 40)
+        if path:
+            points = np.asarray(path)
+            image[points[:, 0], points[:, 1]] = (0, 170, 0)
+        
+        Image.fromarray(image, 'RGB').resize(
+            (self.cols * cell_size, self.rows * cell_size), Image.NEAREST).save(filename)
 #print(full_path)
\ No newline at end of file
@@ -0,0 +1,161 @@
+import threading
+import time
+from typing import List
+
+from path_metrics import load_robot_speeds, save_robot_speeds, SPEED_FILE
+
+
+class RobustEWMA:
+    """
+    Скользящая оценка с отбрасыванием выбросов
+
+    Среднее и среднее абсолютное отклонение сглаживаются экспоненциально
+    (как оценка RTT в TCP). Замер дальше threshold отклонений от среднего
+    считается выбросом и не учитывается (промах метки, пробуксовка). Если
+    выбросов подряд набирается reseed_after, значит сдвинулось само значение
+    (например, поменяли аккумулятор): оценка перезапускается с их медианы.
+    Начальное значение из файла калибровки - априорная оценка: первый замер
+    заменяет его, как первый замер RTT в TCP, но не дальше порога выбросов
+    от него. Так устаревший файл исправляется с первого маршрута, а промах
+    метки сразу после запуска не затирает сохранённую калибровку.
+    """
+
+    def __init__(self, initial: float, alpha: float = 0.2, threshold: float = 3.0,
+                 min_deviation: float = 0.05, reseed_after: int = 5):
+        """
+        Args:
+            initial: Оценка до первого замера (из файла калибровки)
+            alpha: Вес нового замера (0..1), больше - быстрее реагирует
+            threshold: Сколько отклонений от среднего допустимо для замера
+            min_deviation: Нижняя граница отклонения как доля среднего,
+                чтобы после ряда одинаковых замеров не отбрасывалось всё
+            reseed_after: Сколько выбросов подряд перезапускают оценку
+        """
+        self.value = initial
+        self.deviation = initial * min_deviation
+        self.alpha = alpha
+        self.threshold = threshold
+        self.min_deviation = min_deviation
+        self.reseed_after = reseed_after
+        self.samples = 0
+        self.rejected = 0
+        self._outliers: List[float] = []
+
+    def update(self, sample: float) -> bool:
+        """Учёт замера, True - принят, False - отброшен как выброс"""
+        error = sample - self.value
+        allowed = self.threshold * max(self.deviation, self.value * self.min_deviation)
+        if not self.samples:
+            error = max(-allowed, min(allowed, error))
+            self.value += error
+            self.deviation = max(abs(error), self.value * self.min_deviation)
+            self.samples = 1
+            return True
+        if abs(error) > allowed:
+            self.rejected += 1
+            self._outliers.append(sample)
+            if len(self._outliers) < self.reseed_after:
+                return False
+            # Значение действительно сдвинулось - начинаем с медианы выбросов
+            self._outliers.sort()
+            self.value = self._outliers[len(self._outliers) // 2]
+            self.deviation = self.value * self.min_deviation
+            self._outliers = []
+            self.samples += 1
+            return True
+
+        self._outliers = []
+        self.value += self.alpha * error
+        self.deviation += self.alpha * (abs(error) - self.deviation)
+        self.samples += 1
+        return True
+
+
+class OnlineCalibrator:
+    """
+    Автокалибровка времени проезда клетки и поворота по ходу маршрутов
+
+    Исполнитель маршрута сообщает время от включения моторов до NFC-метки
+    конечной клетки команды FORWARD (observe_move) и, если есть чем его измерить,
+    время поворота (observe_turn). Оценки хранятся в RobustEWMA и
+    сохраняются в robot_speed.txt атомарно, не чаще save_interval секунд
+    и только при заметном изменении.
+
+    Повороты выполняются по времени без датчика, поэтому прямых замеров
+    обычно нет. Тогда время поворота меняется в той же пропорции, что время
+    проезда клетки: оба зависят от напряжения аккумулятора одинаково.
+    """
+
+    def __init__(self, filename: str = SPEED_FILE, alpha: float = 0.2,
+                 save_interval: float = 30.0, save_tolerance: float = 0.01):
+        """
+        Args:
+            filename: Файл калибровки (robot_speed.txt)
+            alpha: Вес нового замера в скользящих оценках
+            save_interval: Минимальный интервал между записями файла, с
+            save_tolerance: Относительное изменение, с которого файл переписывается
+        """
+        self.filename = filename
+        self.save_interval = save_interval
+        self.save_tolerance = save_tolerance
+        try:
+            speeds = load_robot_speeds(filename)
+        except FileNotFoundError:
+            speeds = {}
+        self._saved_move = speeds.get('speed_move', 1.0)
+        self._saved_rotate = speeds.get('speed_rotate', 0.57)
+        self._base_move = self._saved_move
+        self._base_rotate = self._saved_rotate
+        self.move = RobustEWMA(self._saved_move, alpha)
+        self.rotate = RobustEWMA(self._saved_rotate, alpha)
+        self._last_save = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def move_time(self) -> float:
+        """Текущая оценка времени проезда клетки, с"""
+        return self.move.value
+
+    @property
+    def rotate_time(self) -> float:
+        """Текущая оценка времени поворота на 90°, с"""
+        if self.rotate.samples:
+            return self.rotate.value
+        # Нет замеров поворотов - переносим на них дрейф скорости движения
+        return self._base_rotate * self.move.value / self._base_move
+
+    def observe_move(self, duration: float, cells: float) -> bool:
+        """Проезд cells клеток по прямой за duration секунд"""
+        if cells <= 0 or duration <= 0:
+            return False
+        with self._lock:
+            return self.move.update(duration / cells)
+
+    def observe_turn(self, duration: float, quarter_turns: float = 1) -> bool:
+        """Поворот на quarter_turns четвертей оборота за duration секунд"""
+        if quarter_turns <= 0 or duration <= 0:
+            return False
+        with self._lock:
+            if not self.rotate.samples:
+                self.rotate.value = self.rotate_time
+            return self.rotate.update(duration / quarter_turns)
+
+    def save(self, force: bool = False) -> bool:
+        """
+        Запись текущих оценок в файл калибровки
+
+        Returns:
+            bool: True если файл был переписан
+        """
+        with self._lock:
+            move, rotate = self.move_time, self.rotate_time
+            changed = (abs(move - self._saved_move) > self.save_tolerance * self._saved_move or
+                       abs(rotate - self._saved_rotate) > self.save_tolerance * self._saved_rotate)
+            now = time.monotonic()
+            if not force and (not changed or now - self._last_save < self.save_interval):
+                return False
+            save_robot_speeds({'speed_rotate': round(rotate, 4),
+                               'speed_move': round(move, 4)}, self.filename)
+            self._saved_move, self._saved_rotate = move, rotate
+            self._last_save = now
+            return True
@@ -0,0 +1,110 @@
+"""
+Сравнение открытых списков A*: двоичная куча (heapq) и корзины (Dial)
+Запуск: python3 benchmark_astar.py [размер_карты] [число_запросов]
+
+Корзины извлекают равные (f, g) в порядке позиции, как куча, поэтому
+пути совпадают. Выигрыша это не даёт: на карте 300x300 операции открытого
+списка на корзинах в 0.7-0.9 раза медленнее кучи, A* целиком - x0.9-1.0,
+потому что основное время уходит на перебор соседей, а не на очередь.
+Поэтому по умолчанию в RobotPathFinder используется куча.
+"""
+import random
+import sys
+import time
+from RobotPathFinder import RobotPathFinder, _HeapOpenList, _BucketOpenList
+
+
+def make_maze(size: int, density: float = 0.25, seed: int = 1):
+    """Случайная карта со стеллажами (1 - препятствие)"""
+    rnd = random.Random(seed)
+    matrix = [[1 if rnd.random() < density else 0 for _ in range(size)]
+              for _ in range(size)]
+    # Сквозные проходы, чтобы карта была в основном связной
+    for i in range(0, size, 4):
+        for j in range(size):
+            matrix[i][j] = 0
+            matrix[j][i] = 0
+    return matrix
+
+
+class _RecordingOpenList(_HeapOpenList):
+    """Куча, которая записывает все операции A* для повторного прогона"""
+    trace = []
+    
+    def push(self, f_score, g_score, position, path):
+        self.trace.append((f_score, g_score, position))
+        super().push(f_score, g_score, position, path)
+    
+    def pop(self):
+        self.trace.append(None)
+        return super().pop()
+
+
+REPEATS = 3  # берём лучшее время из нескольких прогонов, чтобы убрать шум
+
+
+def run_queries(path_finder: RobotPathFinder, queries):
+    """Время выполнения всех запросов и суммарная длина найденных путей"""
+    best = float('inf')
+    for _ in range(REPEATS):
+        total = 0
+        t0 = time.perf_counter()
+        for start, end in queries:
+            path = path_finder.find_path_astar(start, end)
+            total += len(path) if path else 0
+        best = min(best, time.perf_counter() - t0)
+    return best, total
+
+
+def replay(open_list_cls, traces):
+    """Прогон записанных операций push/pop на выбранном открытом списке"""
+    best = float('inf')
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        for trace in traces:
+            open_set = open_list_cls()
+            for op in trace:
+                if op is None:
+                    open_set.pop()
+                else:
+                    open_set.push(op[0], op[1], op[2], None)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    matrix = make_maze(size)
+    
+    rnd = random.Random(2)
+    free = [(r, c) for r in range(size) for c in range(size) if matrix[r][c] == 0]
+    queries = [tuple(rnd.sample(free, 2)) for _ in range(count)]
+    
+    print(f"Карта {size}x{size}, запросов: {count}")
+    
+    # 1. Полный поиск пути
+    results = {}
+    for open_list in ('heap', 'bucket'):
+        path_finder = RobotPathFinder(matrix, obstacles=[1], open_list=open_list)
+        elapsed, total = run_queries(path_finder, queries)
+        results[open_list] = elapsed
+        print(f"  A* ({open_list:6s}): {elapsed:.3f} с (суммарная длина путей {total})")
+    print(f"  Ускорение A*: x{results['heap'] / results['bucket']:.2f}")
+    
+    # 2. Только операции открытого списка на реальной последовательности A*
+    traces = []
+    path_finder = RobotPathFinder(matrix, obstacles=[1])
+    path_finder._make_open_list = _RecordingOpenList
+    for start, end in queries:
+        _RecordingOpenList.trace = []
+        path_finder.find_path_astar(start, end)
+        traces.append(_RecordingOpenList.trace)
+    
+    ops = sum(len(trace) for trace in traces)
+    heap_time = replay(_HeapOpenList, traces)
+    bucket_time = replay(_BucketOpenList, traces)
+    print(f"Открытый список, {ops} операций push/pop:")
+    print(f"  heap  : {heap_time:.3f} с")
+    print(f"  bucket: {bucket_time:.3f} с")
+    print(f"  Ускорение корзин: x{heap_time / bucket_time:.2f}")
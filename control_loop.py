@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Планировщик цикла управления с фиксированной частотой
+для контроллеров гусеничного робота (tank2.py, tank3.py)
+"""
+
+import math
+import time
+from bisect import bisect_left
+from enum import Enum
+from typing import Callable, List, Optional
+from telemetry import LOOP
+
+# Границы корзин гистограмм, мс (последняя корзина - всё, что больше)
+HISTOGRAM_EDGES_MS = [0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 50, 100]
+
+
+class OverrunPolicy(Enum):
+    """Что делать, если итерация не уложилась в период"""
+    SKIP = 0       # пропустить опоздавшие такты и ждать следующий по сетке
+    CATCH_UP = 1   # выполнить пропущенные такты подряд (не больше max_catch_up)
+
+
+class Histogram:
+    """Гистограмма времён с фиксированными корзинами (в миллисекундах)"""
+
+    def __init__(self, edges_ms: List[float] = None):
+        self.edges_ms = list(edges_ms or HISTOGRAM_EDGES_MS)
+        self.counts = [0] * (len(self.edges_ms) + 1)
+        self.total = 0
+        self.max_ms = 0.0
+        self.sum_ms = 0.0
+
+    def add(self, seconds: float):
+        ms = seconds * 1000.0
+        self.counts[bisect_left(self.edges_ms, ms)] += 1
+        self.total += 1
+        self.sum_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    @property
+    def mean_ms(self) -> float:
+        return self.sum_ms / self.total if self.total else 0.0
+
+    def percentile_ms(self, fraction: float) -> float:
+        """Верхняя граница корзины, в которую попадает заданная доля замеров"""
+        if not self.total:
+            return 0.0
+        needed = fraction * self.total
+        seen = 0
+        for edge, count in zip(self.edges_ms + [self.max_ms], self.counts):
+            seen += count
+            if seen >= needed:
+                return min(edge, self.max_ms)
+        return self.max_ms
+
+    def format(self) -> str:
+        lines = []
+        lower = 0.0
+        for edge, count in zip(self.edges_ms + [math.inf], self.counts):
+            if count:
+                upper = f"{edge:g}" if edge != math.inf else "∞"
+                lines.append(f"  {lower:g}..{upper} мс: {count}")
+            lower = edge
+        return '\n'.join(lines)
+
+
+class ControlLoop:
+    """
+    Цикл управления по абсолютным дедлайнам
+
+    Вместо time.sleep(период) после работы переменной длины цикл спит до
+    момента start + k * период, поэтому средняя частота не уплывает, а
+    задержка одной итерации не сдвигает все следующие. Для каждой итерации
+    записываются время работы (latency) и опоздание пробуждения (jitter).
+
+    Пример:
+        loop = ControlLoop(rate_hz=50)
+        while running:
+            step()
+            loop.wait()
+    """
+
+    def __init__(self, rate_hz: float = 50.0,
+                 policy: OverrunPolicy = OverrunPolicy.SKIP,
+                 max_catch_up: int = 5, telemetry=None, watchdog=None):
+        """
+        Args:
+            rate_hz: Частота цикла, Гц
+            policy: Поведение при переполнении периода (см. OverrunPolicy)
+            max_catch_up: Для CATCH_UP - сколько тактов можно догонять,
+                более старые считаются пропущенными
+            telemetry: telemetry.TelemetryBuffer - если задан, каждая итерация
+                пишет в него событие LOOP (время работы и опоздание)
+            watchdog: motion_watchdog.Watchdog - отметка в нём каждую итерацию
+        """
+        if rate_hz <= 0:
+            raise ValueError("Частота цикла должна быть положительной")
+        self.period = 1.0 / rate_hz
+        self.policy = policy
+        self.max_catch_up = max_catch_up
+        self.telemetry = telemetry
+        self.watchdog = watchdog
+
+        self.latency = Histogram()   # время работы итерации
+        self.jitter = Histogram()    # опоздание пробуждения относительно дедлайна
+        self.cycles = 0
+        self.overruns = 0            # итерации, не уложившиеся в период
+        self.skipped = 0             # такты, которые так и не были выполнены
+
+        self._deadline: Optional[float] = None
+        self._cycle_start: Optional[float] = None
+
+    def start(self):
+        """Начало отсчёта: первая итерация выполняется сразу"""
+        now = time.monotonic()
+        self._deadline = now
+        self._cycle_start = now
+
+    def wait(self):
+        """Конец итерации: учёт статистики и сон до следующего дедлайна"""
+        if self._deadline is None:
+            self.start()
+        now = time.monotonic()
+        work = now - self._cycle_start
+        self.latency.add(work)
+        self.cycles += 1
+        if self.watchdog is not None:
+            self.watchdog.feed()
+
+        deadline = self._deadline + self.period
+        if now > deadline:
+            self.overruns += 1
+            behind = int((now - deadline) / self.period)   # целых тактов позади
+            if self.policy == OverrunPolicy.SKIP:
+                deadline += (behind + 1) * self.period
+                self.skipped += behind + 1
+            elif behind > self.max_catch_up:
+                deadline += (behind - self.max_catch_up) * self.period
+                self.skipped += behind - self.max_catch_up
+
+        delay = deadline - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._cycle_start = time.monotonic()
+        late = max(0.0, self._cycle_start - deadline)
+        self.jitter.add(late)
+        self._deadline = deadline
+        if self.telemetry is not None:
+            self.telemetry.record(LOOP, work, late)
+
+    def run(self, step: Callable[[], None], should_continue: Callable[[], bool]):
+        """Вызов step с заданной частотой, пока should_continue() истинно"""
+        self.start()
+        while should_continue():
+            step()
+            self.wait()
+
+    def report(self) -> str:
+        """Сводка: частота, переполнения и гистограммы задержек"""
+        return '\n'.join([
+            f"Циклов: {self.cycles}, переполнений: {self.overruns}, пропущено тактов: {self.skipped}",
+            f"Работа итерации: среднее {self.latency.mean_ms:.2f} мс, "
+            f"p99 <= {self.latency.percentile_ms(0.99):g} мс, макс {self.latency.max_ms:.2f} мс",
+            self.latency.format(),
+            f"Опоздание пробуждения: среднее {self.jitter.mean_ms:.3f} мс, "
+            f"p99 <= {self.jitter.percentile_ms(0.99):g} мс, макс {self.jitter.max_ms:.2f} мс",
+            self.jitter.format(),
+        ])
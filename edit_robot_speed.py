@@ -1,3 +1,4 @@
+from path_metrics import save_robot_speeds
 
 def edit_robot_speed():
     global speeds
@@ -14,14 +15,13 @@ def edit_robot_speed():
         for line in file:
             data = line.split(' ')
             speeds.append(float(data[1]))
-    with open('robot_speed.txt', 'w' , encoding = 'utf-8') as file:
-        data = file
-        edit = input('edit(y/n) ')
-        if edit == 'y':
-            if move_s == speed:
-                data.writelines('speed_rotate: '+ str(speeds[0]) + '\n' + 'speed_move: '+ str(move_s) + ' ')
-            if rotate_s == speed:
-                data.writelines('speed_rotate: '+ str(rotate_s) + '\n' + 'speed_move: '+ str(speeds[1])+ ' ')
+    # Файл переписывается атомарно: его же читают боты и автокалибровка
+    edit = input('edit(y/n) ')
+    if edit == 'y':
+        if move_s == speed:
+            save_robot_speeds({'speed_rotate': speeds[0], 'speed_move': move_s})
+        if rotate_s == speed:
+            save_robot_speeds({'speed_rotate': rotate_s, 'speed_move': speeds[1]})
     with open('robot_speed.txt', 'r' , encoding = 'utf-8') as file:
         speeds = []
         for line in file:
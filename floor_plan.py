@@ -0,0 +1,117 @@
+from typing import List, Optional, Tuple
+import numpy as np
+from PIL import Image
+
+from RobotPathFinder import RobotPathFinder
+
+# Планы помещений бывают больше стандартного предела PIL на "бомбу"
+# (около 89 Мп), поэтому при загрузке плана предел поднимается до этого
+MAX_PLAN_PIXELS = 400_000_000
+
+
+def image_to_grid(pixels: np.ndarray, cell_size: int, threshold: int = 128,
+                  invert: bool = False) -> np.ndarray:
+    """
+    Преобразование изображения в сетку препятствий
+
+    Клетка считается препятствием, если в её блоке cell_size x cell_size есть
+    хотя бы один тёмный пиксель (max-pooling по препятствиям), поэтому стены
+    толщиной в один пиксель не теряются при уменьшении.
+
+    Args:
+        pixels: Изображение в оттенках серого (uint8, высота x ширина)
+        cell_size: Размер клетки сетки в пикселях
+        threshold: Пиксели темнее порога считаются стеной
+        invert: True, если стены на плане светлые, а фон тёмный
+
+    Returns:
+        np.ndarray: Сетка uint8 (1 - препятствие, 0 - свободно)
+    """
+    if cell_size < 1:
+        raise ValueError("Размер клетки должен быть положительным")
+    pixels = np.asarray(pixels, dtype=np.uint8)
+    if invert:
+        pixels = 255 - pixels
+
+    height, width = pixels.shape
+    rows = -(-height // cell_size)
+    cols = -(-width // cell_size)
+
+    # Неполные блоки по краям дополняем белым (свободным) цветом
+    pad_h, pad_w = rows * cell_size - height, cols * cell_size - width
+    if pad_h or pad_w:
+        pixels = np.pad(pixels, ((0, pad_h), (0, pad_w)), constant_values=255)
+
+    # Самый тёмный пиксель блока: сначала по строкам блока, затем по столбцам.
+    # Порог применяется уже к уменьшенной сетке, а не ко всем пикселям
+    darkest = pixels.reshape(rows, cell_size, cols * cell_size).min(axis=1)
+    darkest = darkest.reshape(rows, cols, cell_size).min(axis=2)
+    return (darkest < threshold).astype(np.uint8)
+
+
+def load_floor_plan(filename: str, cell_size: int, threshold: int = 128,
+                    invert: bool = False,
+                    max_pixels: Optional[int] = MAX_PLAN_PIXELS) -> List[List[int]]:
+    """
+    Загрузка плана помещения (PNG/JPG) в матрицу для RobotPathFinder
+
+    Args:
+        filename: Путь к изображению плана
+        cell_size: Размер клетки сетки в пикселях
+        threshold: Пиксели темнее порога считаются стеной
+        invert: True, если стены на плане светлые, а фон тёмный
+        max_pixels: Предел размера изображения для проверки PIL на "бомбу"
+            (None - без проверки). Меняется только на время загрузки
+
+    Returns:
+        List[List[int]]: Матрица пространства (1 - препятствие, 0 - свободно)
+    """
+    previous = Image.MAX_IMAGE_PIXELS
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    try:
+        with Image.open(filename) as img:
+            pixels = np.asarray(img.convert('L'))
+    finally:
+        Image.MAX_IMAGE_PIXELS = previous
+    return image_to_grid(pixels, cell_size, threshold, invert).tolist()
+
+
+def cell_to_pixel(cell: Tuple[int, int], cell_size: int) -> Tuple[int, int]:
+    """Координаты (x, y) центра клетки сетки на исходном изображении"""
+    row, col = cell
+    return (col * cell_size + cell_size // 2, row * cell_size + cell_size // 2)
+
+
+def pixel_to_cell(point: Tuple[int, int], cell_size: int) -> Tuple[int, int]:
+    """Клетка сетки, в которую попадает пиксель (x, y) исходного изображения"""
+    x, y = point
+    return (int(y) // cell_size, int(x) // cell_size)
+
+
+def path_finder_from_image(filename: str, cell_size: int, threshold: int = 128,
+                           invert: bool = False, max_pixels: Optional[int] = MAX_PLAN_PIXELS,
+                           **kwargs) -> RobotPathFinder:
+    """
+    Создание RobotPathFinder по изображению плана
+
+    Args:
+        filename: Путь к изображению плана
+        cell_size: Размер клетки сетки в пикселях
+        threshold: Пиксели темнее порога считаются стеной
+        invert: True, если стены на плане светлые, а фон тёмный
+        max_pixels: Предел размера изображения (см. load_floor_plan)
+        **kwargs: Параметры RobotPathFinder (allow_diagonal, robot_size, ...)
+    """
+    matrix = load_floor_plan(filename, cell_size, threshold, invert, max_pixels)
+    return RobotPathFinder(matrix, **kwargs)
+
+
+# Пример использования
+if __name__ == "__main__":
+    import sys
+
+    plan = sys.argv[1] if len(sys.argv) > 1 else "input.jpg"
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    finder = path_finder_from_image(plan, size)
+    print(f"Сетка {finder.rows}x{finder.cols} из {plan}, клетка {size} px")
+    print(finder.visualize_path([]))
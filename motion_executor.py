@@ -0,0 +1,295 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import List, Tuple, Optional, Callable, Set
+
+from motion_primitives import (MotionCommand, FORWARD, TURN_LEFT, TURN_RIGHT, TURN_180,
+                               command_time, forward_targets)
+from telemetry import COMMAND, TAG, STOP
+
+
+class MotionExecutor:
+    """
+    Выполнение маршрутов на одном цикле событий asyncio
+
+    Команды моторов, опрос NFC-меток и уведомления пользователю - отдельные
+    корутины одного цикла, который работает в своём потоке. Обработчики бота
+    только ставят маршрут в очередь и сразу возвращаются. Аварийная остановка
+    глушит моторы прямо в вызывающем потоке и отменяет задачу маршрута:
+    ожидание asyncio.sleep прерывается сразу, а не по окончании шага.
+    Блокирующие вызовы (чтение метки, отправка сообщения) выполняются
+    в пуле потоков и не задерживают моторы.
+
+    Если известны клетки маршрута и есть считыватель меток, команда FORWARD
+    заканчивается, когда прочитана метка её конечной клетки, а рассчитанное
+    по калибровке время служит только таймаутом. Так ошибка калибровки
+    и проскальзывание не накапливаются от команды к команде.
+    """
+
+    def __init__(self, robot, move_time: float = 1.0, rotate_time: float = 0.57,
+                 speed: float = 1.0,
+                 read_checkpoint: Optional[Callable[[], Optional[Tuple[int, int]]]] = None,
+                 notify: Optional[Callable[[str], None]] = None,
+                 nfc_poll_interval: float = 0.05,
+                 tag_timeout: float = 1.5,
+                 tag_offset: float = 0.0,
+                 calibrator=None,
+                 loop: Optional[asyncio.AbstractEventLoop] = None,
+                 telemetry=None,
+                 watchdog=None):
+        """
+        Args:
+            robot: Робот (pico.Robot или совместимый: forward, left, right, stop)
+            move_time: Время проезда одной клетки, с (speed_move)
+            rotate_time: Время поворота на 90°, с (speed_rotate)
+            speed: Скорость моторов от 0 до 1
+            read_checkpoint: Чтение NFC-метки: клетка (row, col) или None.
+                Может блокировать (короткий таймаут считывателя)
+            notify: Отправка сообщения пользователю (может блокировать)
+            nfc_poll_interval: Пауза между опросами считывателя, с
+            tag_timeout: Во сколько раз дольше расчётного времени FORWARD
+                может ехать до метки своей конечной клетки. Не нашёл -
+                робот останавливается, маршрут прерывается
+            tag_offset: За сколько клеток до центра метки она уже читается:
+                после метки конечной клетки робот доезжает столько по времени
+            calibrator: auto_calibration.OnlineCalibrator - если задан, время
+                команд берётся из его оценок, а время от включения моторов
+                до метки конечной клетки каждой FORWARD уточняет их
+            loop: Готовый цикл событий (например, с виртуальным временем
+                из robot_sim). Тогда свой поток не создаётся, а маршруты
+                запускаются корутиной execute на этом цикле
+            telemetry: telemetry.TelemetryBuffer для событий COMMAND, TAG и STOP
+            watchdog: motion_watchdog.Watchdog - взводится на время маршрута,
+                цикл событий отмечается в нём каждые check_interval секунд.
+                Если цикл завис, сторож сам глушит моторы
+        """
+        self.robot = robot
+        self.move_time = move_time
+        self.rotate_time = rotate_time
+        self.speed = speed
+        self.read_checkpoint = read_checkpoint
+        self.notify = notify
+        self.nfc_poll_interval = nfc_poll_interval
+        self.tag_timeout = tag_timeout
+        self.tag_offset = tag_offset
+        self.calibrator = calibrator
+        self.telemetry = telemetry
+        self.watchdog = watchdog
+
+        # Последняя считанная метка и все метки текущего маршрута
+        self.position: Optional[Tuple[int, int]] = None
+        self.visited: List[Tuple[int, int]] = []
+        # Клетка, на метке которой должна закончиться текущая команда FORWARD
+        self._target: Optional[Tuple[int, int]] = None
+        self._arrived: Optional[asyncio.Event] = None
+
+        # Моторы включаются только под замком и только без флага остановки,
+        # чтобы аварийная остановка не проиграла гонку следующей команде
+        self._motor_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self._thread = None
+        if loop is not None:
+            self.loop = loop
+            return
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name='motion-executor',
+                                        daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    @property
+    def busy(self) -> bool:
+        """Выполняется ли сейчас маршрут"""
+        return self._task is not None and not self._task.done()
+
+    def run_route(self, commands: List[MotionCommand],
+                  checkpoints: Optional[List[Tuple[int, int]]] = None) -> Future:
+        """
+        Запуск маршрута из любого потока (обработчика бота)
+
+        Args:
+            commands: Команды от motion_primitives.compile_path
+            checkpoints: Путь, по которому построены команды (клетки с NFC-метками,
+                о прохождении которых сообщать). Концы отрезков должны быть
+                с метками: по ним заканчиваются команды FORWARD
+
+        Returns:
+            Future: Завершится True - маршрут пройден, False - остановлен
+            или робот не нашёл метку нужной клетки
+        """
+        return asyncio.run_coroutine_threadsafe(self._start(commands, checkpoints), self.loop)
+
+    async def _start(self, commands, checkpoints) -> bool:
+        if self.busy:
+            raise RuntimeError("Робот уже выполняет маршрут")
+        # Флаг остановки сбрасывается только здесь: повторный run_route во время
+        # маршрута не должен снимать аварийную остановку с идущего маршрута
+        self._stopped.clear()
+        self._task = asyncio.ensure_future(self.execute(commands, checkpoints))
+        try:
+            return await self._task
+        except asyncio.CancelledError:
+            return False
+
+    def emergency_stop(self):
+        """
+        Аварийная остановка из любого потока: моторы глушатся сразу,
+        задача маршрута отменяется на цикле событий
+        """
+        with self._motor_lock:
+            self._stopped.set()
+            self.robot.stop()
+        if self.telemetry is not None:
+            self.telemetry.record(STOP)
+        self.loop.call_soon_threadsafe(self._cancel_route)
+
+    def _cancel_route(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    def shutdown(self):
+        """Остановка робота и цикла событий"""
+        self.emergency_stop()
+        if self._thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._drain(), self.loop).result(timeout=1.0)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=1.0)
+
+    async def _drain(self):
+        """Ожидание отменённых задач, чтобы цикл остановился без висящих корутин"""
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def execute(self, commands: List[MotionCommand],
+                      checkpoints: Optional[List[Tuple[int, int]]] = None) -> bool:
+        """
+        Корутина маршрута: команды моторов по очереди, параллельно опрос
+        NFC-меток. Моторы останавливаются при любом выходе, в том числе
+        при отмене.
+        """
+        self.visited = []
+        targets = None
+        if self.read_checkpoint is not None and checkpoints:
+            targets = forward_targets([tuple(cell) for cell in checkpoints])
+            if len(targets) != sum(command.op == FORWARD for command in commands):
+                # Команды построены не по этому пути - едем по времени
+                targets = None
+        self._arrived = asyncio.Event()
+        lost = None
+        watcher = None
+        if self.read_checkpoint is not None:
+            watcher = asyncio.ensure_future(self._watch_checkpoints(set(checkpoints or ())))
+        heartbeat = None
+        if self.watchdog is not None:
+            self.watchdog.arm()
+            heartbeat = asyncio.ensure_future(self._heartbeat())
+        await self._notify("🚀 Начинаю движение по маршруту...")
+        try:
+            for index, command in enumerate(commands):
+                move_time, rotate_time = self.move_time, self.rotate_time
+                if self.calibrator is not None:
+                    move_time, rotate_time = self.calibrator.move_time, self.calibrator.rotate_time
+                duration = command_time(command, move_time, rotate_time)
+                target = None
+                if targets is not None and command.op == FORWARD:
+                    target = targets.pop(0)
+                self._target = target
+                self._arrived.clear()
+                self._start_motors(command)
+                started = self.loop.time()
+                if self.telemetry is not None:
+                    self.telemetry.record(COMMAND, index, duration)
+                if target is None:
+                    await asyncio.sleep(duration)
+                else:
+                    try:
+                        await asyncio.wait_for(self._arrived.wait(),
+                                               duration * self.tag_timeout)
+                        if self.calibrator is not None and command.count > 1:
+                            # Замер от старта с центра клетки, а не от метки, прочитанной
+                            # на месте: метка финиша читается за tag_offset до центра.
+                            # На одной клетке ошибка точки старта сравнима с проездом
+                            self.calibrator.observe_move(self.loop.time() - started,
+                                                         command.count - self.tag_offset)
+                        await asyncio.sleep(self.tag_offset * move_time)
+                    except asyncio.TimeoutError:
+                        lost = target
+                self.robot.stop()
+                if lost is not None:
+                    break
+            if lost is None and checkpoints and self.read_checkpoint is not None:
+                # Последняя прочитанная метка должна быть меткой финиша
+                goal = tuple(checkpoints[-1])
+                if self.position != goal:
+                    lost = goal
+        except asyncio.CancelledError:
+            self.robot.stop()
+            await self._notify("🛑 Маршрут остановлен")
+            raise
+        finally:
+            self.robot.stop()
+            self._target = None
+            if watcher is not None:
+                watcher.cancel()
+            if heartbeat is not None:
+                heartbeat.cancel()
+                self.watchdog.disarm()
+            if self.calibrator is not None:
+                self.loop.run_in_executor(None, self.calibrator.save)
+        if lost is not None:
+            if self.position is None:
+                where = "метки не прочитаны"
+            else:
+                where = f"последняя метка ({self.position[0]}, {self.position[1]})"
+            await self._notify(f"⚠️ Не найдена метка ({lost[0]}, {lost[1]}), "
+                               f"робот остановлен: {where}")
+            return False
+        await self._notify("✅ Маршрут завершен!")
+        return True
+
+    def _start_motors(self, command: MotionCommand):
+        with self._motor_lock:
+            if self._stopped.is_set():
+                raise asyncio.CancelledError()
+            if command.op == FORWARD:
+                self.robot.forward(self.speed)
+            elif command.op == TURN_LEFT:
+                self.robot.left(self.speed)
+            elif command.op in (TURN_RIGHT, TURN_180):
+                self.robot.right(self.speed)
+            else:
+                raise ValueError(f"Неизвестная команда: {command.op}")
+
+    async def _watch_checkpoints(self, checkpoints: Set[Tuple[int, int]]):
+        """Опрос считывателя меток в пуле потоков, пока идёт маршрут"""
+        while True:
+            cell = await self.loop.run_in_executor(None, self.read_checkpoint)
+            if cell is not None and cell != self.position:
+                if self.telemetry is not None:
+                    self.telemetry.record(TAG, cell[0], cell[1])
+                self.position = cell
+                self.visited.append(cell)
+                if cell == self._target:
+                    self._arrived.set()
+                if not checkpoints or cell in checkpoints:
+                    await self._notify(f"📍 Точка ({cell[0]}, {cell[1]})")
+            await asyncio.sleep(self.nfc_poll_interval)
+
+    async def _heartbeat(self):
+        """Отметки в стороже, пока цикл событий не завис"""
+        while True:
+            self.watchdog.feed()
+            await asyncio.sleep(self.watchdog.check_interval)
+
+    async def _notify(self, text: str):
+        """Уведомление без блокировки цикла (отправка в пуле потоков)"""
+        if self.notify is None:
+            return
+        # Сообщение уходит в фоне: медленная сеть не задерживает моторы
+        self.loop.run_in_executor(None, self.notify, text)
@@ -0,0 +1,163 @@
+from typing import List, Tuple, NamedTuple, Optional, Callable
+import time
+
+from RobotPathFinder import Direction
+from path_metrics import load_robot_speeds, SPEED_FILE
+
+FORWARD = 'FORWARD'
+TURN_LEFT = 'TURN_LEFT'
+TURN_RIGHT = 'TURN_RIGHT'
+TURN_180 = 'TURN_180'
+
+# Направления по часовой стрелке: поворот направо - следующий элемент
+HEADINGS = [Direction.UP, Direction.RIGHT, Direction.DOWN, Direction.LEFT]
+# Названия направлений, которыми пользуются боты (rt в map.py)
+HEADING_NAMES = {'верх': Direction.UP, 'право': Direction.RIGHT,
+                 'низ': Direction.DOWN, 'лево': Direction.LEFT}
+
+# Кратчайший поворот по разности индексов направлений (по часовой стрелке)
+_TURNS = {1: TURN_RIGHT, 2: TURN_180, 3: TURN_LEFT}
+
+
+class MotionCommand(NamedTuple):
+    """Команда движения: FORWARD на count клеток или поворот"""
+    op: str
+    count: int = 1
+
+
+def heading_from_name(name: str) -> Tuple[int, int]:
+    """Направление по названию ('верх', 'право', 'низ', 'лево')"""
+    return HEADING_NAMES[name]
+
+
+def compile_path(path: List[Tuple[int, int]],
+                 heading: Tuple[int, int],
+                 end_heading: Optional[Tuple[int, int]] = None
+                 ) -> Tuple[List[MotionCommand], Tuple[int, int]]:
+    """
+    Преобразование пути в минимальный список команд движения
+
+    Подряд идущие шаги в одном направлении сливаются в один FORWARD n,
+    смена направления - один кратчайший поворот (налево, а не три раза
+    направо). Подходят и пути по клеткам, и упрощённые optimize_path.
+
+    Args:
+        path: Путь робота (только прямые отрезки, без диагоналей)
+        heading: Текущее направление робота (Direction.*)
+        end_heading: Направление, в которое нужно развернуться на финише
+
+    Returns:
+        Tuple[List[MotionCommand], Tuple[int, int]]: Команды и направление
+        робота после их выполнения
+    """
+    if heading not in HEADINGS:
+        raise ValueError(f"Неизвестное направление робота: {heading}")
+
+    commands: List[MotionCommand] = []
+    for (r1, c1), (r2, c2) in zip(path, path[1:]):
+        dr, dc = r2 - r1, c2 - c1
+        if dr and dc:
+            raise ValueError(f"Диагональный шаг {(r1, c1)} -> {(r2, c2)} не поддерживается")
+        if not dr and not dc:
+            continue
+        direction = ((dr > 0) - (dr < 0), (dc > 0) - (dc < 0))
+        distance = abs(dr) + abs(dc)
+
+        if direction == heading and commands and commands[-1].op == FORWARD:
+            commands[-1] = MotionCommand(FORWARD, commands[-1].count + distance)
+            continue
+        _append_turn(commands, heading, direction)
+        heading = direction
+        commands.append(MotionCommand(FORWARD, distance))
+
+    if end_heading is not None:
+        _append_turn(commands, heading, end_heading)
+        heading = end_heading
+    return commands, heading
+
+
+def forward_targets(path: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    Конечные клетки команд FORWARD, которые compile_path строит по path
+
+    Шаги в одном направлении сливаются так же, как в compile_path, поэтому
+    i-я клетка списка - та, где должна закончиться i-я команда FORWARD.
+    """
+    targets: List[Tuple[int, int]] = []
+    direction = None
+    for (r1, c1), (r2, c2) in zip(path, path[1:]):
+        dr, dc = r2 - r1, c2 - c1
+        if not dr and not dc:
+            continue
+        step = ((dr > 0) - (dr < 0), (dc > 0) - (dc < 0))
+        if step == direction:
+            targets[-1] = (r2, c2)
+        else:
+            targets.append((r2, c2))
+        direction = step
+    return targets
+
+
+def _append_turn(commands: List[MotionCommand], heading: Tuple[int, int],
+                 target: Tuple[int, int]):
+    """Добавление кратчайшего поворота от heading к target (если он нужен)"""
+    delta = (HEADINGS.index(target) - HEADINGS.index(heading)) % 4
+    if delta:
+        commands.append(MotionCommand(_TURNS[delta]))
+
+
+def command_time(command: MotionCommand, move_time: float, rotate_time: float) -> float:
+    """Длительность команды по калибровке: секунды на клетку и на поворот 90°"""
+    if command.op == FORWARD:
+        return command.count * move_time
+    if command.op == TURN_180:
+        return 2 * rotate_time
+    return rotate_time
+
+
+def execute(robot, commands: List[MotionCommand],
+            move_time: float = 1.0, rotate_time: float = 0.57,
+            speed: float = 1.0, sleep: Callable[[float], None] = time.sleep):
+    """
+    Выполнение команд на pico.Robot (нужны forward, left, right, stop)
+
+    Движение по времени, как в ботах: мотор включается, через
+    рассчитанное время робот останавливается. Разворот на 180° - один
+    непрерывный поворот направо двойной длительности.
+
+    Args:
+        robot: Робот (pico.Robot или совместимый)
+        commands: Команды от compile_path
+        move_time: Время проезда одной клетки, с (speed_move)
+        rotate_time: Время поворота на 90°, с (speed_rotate)
+        speed: Скорость моторов от 0 до 1
+        sleep: Функция ожидания (для тестов и симуляции)
+    """
+    for command in commands:
+        if command.op == FORWARD:
+            robot.forward(speed)
+        elif command.op == TURN_LEFT:
+            robot.left(speed)
+        elif command.op in (TURN_RIGHT, TURN_180):
+            robot.right(speed)
+        else:
+            raise ValueError(f"Неизвестная команда: {command.op}")
+        sleep(command_time(command, move_time, rotate_time))
+        robot.stop()
+
+
+def execute_with_speed_file(robot, commands: List[MotionCommand],
+                            filename: str = SPEED_FILE, **kwargs):
+    """Выполнение команд с калибровкой из robot_speed.txt"""
+    speeds = load_robot_speeds(filename)
+    execute(robot, commands, move_time=speeds.get('speed_move', 1.0),
+            rotate_time=speeds.get('speed_rotate', 0.57), **kwargs)
+
+
+# Пример использования
+if __name__ == "__main__":
+    full_path = [(0, 0), (0, 1), (0, 2), (0, 3), (1, 3), (2, 3), (2, 2), (2, 1)]
+    commands, heading = compile_path(full_path, heading_from_name('право'))
+    for command in commands:
+        print(command.op, command.count if command.op == FORWARD else '')
+    print('Итоговое направление:', heading)
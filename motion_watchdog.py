@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Сторожевой таймер движения: останавливает моторы, если управляющий
+поток перестал отмечаться (завис на сетевом вызове, долгом чтении и т.п.)
+"""
+
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Callable, Optional
+
+from telemetry import STALL
+
+WATCHDOG_TIMEOUT = 0.5   # сколько секунд без feed считается зависанием
+WATCHDOG_PRIORITY = 50   # приоритет SCHED_FIFO потока сторожа (1..99)
+
+
+class Watchdog:
+    """
+    Сторож в отдельном потоке с повышенным приоритетом
+
+    Пока сторож взведён (arm), управляющий поток должен вызывать feed чаще,
+    чем раз в timeout секунд. Если отметки нет, сторож сам вызывает stop
+    (глушит моторы), пишет длительность зависания и стек зависшего потока,
+    а когда поток снова отметится - сколько всего длилось зависание.
+
+    Поток сторожа получает SCHED_FIFO, если это разрешено (root на
+    Raspberry Pi), и просыпается по своему таймеру. Сетевые и файловые
+    вызовы отпускают GIL, поэтому зависание на них сторож замечает вовремя.
+
+    Пример:
+        watchdog = Watchdog(stop=robot.stop)
+        watchdog.arm()
+        while moving:
+            step()
+            watchdog.feed()
+        watchdog.disarm()
+    """
+
+    def __init__(self, stop: Callable[[], None], timeout: float = WATCHDOG_TIMEOUT,
+                 telemetry=None, log: Callable[[str], None] = print,
+                 priority: int = WATCHDOG_PRIORITY, name: str = 'watchdog'):
+        """
+        Args:
+            stop: Остановка всех моторов. Вызывается из потока сторожа
+            timeout: Допустимый интервал между feed, с
+            telemetry: telemetry.TelemetryBuffer для событий STALL
+            log: Вывод сообщений о зависании
+            priority: Приоритет SCHED_FIFO (0 - не повышать)
+            name: Имя потока сторожа
+        """
+        if timeout <= 0:
+            raise ValueError("Таймаут сторожа должен быть положительным")
+        self.stop = stop
+        self.timeout = timeout
+        self.telemetry = telemetry
+        self.log = log
+        self.priority = priority
+        # Сторож проверяет отметки в несколько раз чаще таймаута
+        self.check_interval = timeout / 4
+
+        self.stalls = 0            # сколько раз сработал
+        self.longest_stall = 0.0   # самое долгое зависание, с
+
+        self._armed = False
+        self._last_feed = time.monotonic()
+        self._owner: Optional[int] = None        # поток, который отмечается
+        self._tripped_at: Optional[float] = None  # последняя отметка перед зависанием
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def arm(self):
+        """Взвести сторож: вызывающий поток с этого момента обязан отмечаться"""
+        self._owner = threading.get_ident()
+        self._last_feed = time.monotonic()
+        self._armed = True
+
+    def feed(self):
+        """Отметка управляющего потока (одна запись времени)"""
+        self._last_feed = time.monotonic()
+
+    def disarm(self):
+        """Снять сторож (робот стоит, отмечаться не нужно)"""
+        self._armed = False
+        self._last_feed = time.monotonic()
+
+    @property
+    def armed(self) -> bool:
+        return self._armed
+
+    def close(self):
+        """Остановка потока сторожа"""
+        self._armed = False
+        self._closed.set()
+        self._thread.join(timeout=1.0)
+
+    def _run(self):
+        self._raise_priority()
+        while not self._closed.wait(self.check_interval):
+            last_feed = self._last_feed
+            if self._tripped_at is not None:
+                if last_feed > self._tripped_at:
+                    self._recovered(last_feed)
+                continue
+            if self._armed and time.monotonic() - last_feed > self.timeout:
+                self._trip(last_feed)
+
+    def _raise_priority(self):
+        if not self.priority:
+            return
+        try:
+            # На Linux 0 - вызывающий поток, а не весь процесс
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.priority))
+        except (AttributeError, OSError) as e:
+            self.log(f"⚠ Сторож работает с обычным приоритетом: {e}")
+
+    def _trip(self, last_feed: float):
+        """Зависание: сначала моторы, потом диагностика"""
+        try:
+            self.stop()
+        except Exception as e:
+            self.log(f"✗ Сторож: ошибка остановки моторов: {e}")
+        stalled = time.monotonic() - last_feed
+        self._tripped_at = last_feed
+        self.stalls += 1
+        if self.telemetry is not None:
+            self.telemetry.record(STALL, stalled)
+        self.log(f"⚠ Сторож: нет отметок {stalled:.3f} с (таймаут {self.timeout:g} с), "
+                 f"моторы остановлены")
+        self.log(self._owner_stack())
+
+    def _recovered(self, last_feed: float):
+        stalled = last_feed - self._tripped_at
+        self._tripped_at = None
+        self.longest_stall = max(self.longest_stall, stalled)
+        if self.telemetry is not None:
+            self.telemetry.record(STALL, stalled, 1)
+        self.log(f"✓ Сторож: управляющий поток ожил, зависание длилось {stalled:.3f} с")
+
+    def _owner_stack(self) -> str:
+        """Стек потока, который перестал отмечаться"""
+        frame = sys._current_frames().get(self._owner)
+        if frame is None:
+            return "Стек зависшего потока недоступен (поток завершился)"
+        thread_name = next((thread.name for thread in threading.enumerate()
+                            if thread.ident == self._owner), str(self._owner))
+        stack = ''.join(traceback.format_stack(frame))
+        return f"Стек потока {thread_name}:\n{stack}"
+
+    def report(self) -> str:
+        """Сводка для вывода при завершении работы"""
+        return (f"Сторож: срабатываний {self.stalls}, "
+                f"самое долгое зависание {self.longest_stall:.3f} с")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Слой вывода на моторы с подавлением лишних записей в GPIO
+(для GMotor в tank2.py и SZDoitMotor в tank3.py)
+"""
+
+from typing import List, Sequence
+import RPi.GPIO as GPIO
+
+DUTY_THRESHOLD = 0.5  # минимальное изменение заполнения ШИМ (%), которое пишется
+
+
+class PWMOutput:
+    """
+    ШИМ-канал с кэшем последнего записанного заполнения
+
+    ChangeDutyCycle вызывается только если заполнение изменилось больше
+    чем на threshold процентов. Выход на 0% и 100% пишется при любом
+    отличии, чтобы мотор останавливался и разгонялся точно.
+    """
+
+    def __init__(self, pwm, threshold: float = DUTY_THRESHOLD, initial: float = 0.0):
+        self.pwm = pwm
+        self.threshold = threshold
+        self.duty = initial
+        self.writes = 0
+        self.suppressed = 0
+
+    def set(self, duty: float, force: bool = False) -> bool:
+        """Установка заполнения (0..100), True - запись в GPIO была"""
+        duty = max(0.0, min(100.0, duty))
+        delta = abs(duty - self.duty)
+        exact = duty in (0.0, 100.0)
+        if not force and (delta == 0 or (delta < self.threshold and not exact)):
+            self.suppressed += 1
+            return False
+        self.pwm.ChangeDutyCycle(duty)
+        self.duty = duty
+        self.writes += 1
+        return True
+
+
+class DirectionPins:
+    """
+    Пины направления с кэшем уровней
+
+    Меняющиеся пины пишутся одним вызовом GPIO.output со списками пинов
+    и уровней, неизменившиеся не пишутся вовсе.
+    """
+
+    def __init__(self, pins: Sequence[int], initial: Sequence[int] = None):
+        self.pins = list(pins)
+        # None - уровень неизвестен, первая запись пройдёт обязательно
+        self.levels: List = list(initial) if initial is not None else [None] * len(self.pins)
+        self.writes = 0
+        self.suppressed = 0
+
+    def set(self, levels: Sequence[int], force: bool = False) -> bool:
+        """Установка уровней всех пинов, True - запись в GPIO была"""
+        changed_pins = []
+        changed_levels = []
+        for i, level in enumerate(levels):
+            if force or self.levels[i] != level:
+                changed_pins.append(self.pins[i])
+                changed_levels.append(level)
+                self.levels[i] = level
+        if not changed_pins:
+            self.suppressed += 1
+            return False
+        GPIO.output(changed_pins, changed_levels)
+        self.writes += 1
+        return True
+
+    def invalidate(self):
+        """Забыть уровни (после GPIO.cleanup или записи в обход слоя)"""
+        self.levels = [None] * len(self.pins)
+
+
+def output_counters(*outputs) -> str:
+    """Строка со счётчиками записей для вывода при завершении работы"""
+    writes = sum(output.writes for output in outputs)
+    suppressed = sum(output.suppressed for output in outputs)
+    total = writes + suppressed
+    share = 100.0 * suppressed / total if total else 0.0
+    return f"Записей в GPIO: {writes}, подавлено: {suppressed} ({share:.0f}%)"
@@ -0,0 +1,227 @@
+"""
+Клиент сервиса планирования путей (path_service.py)
+
+Протокол: кадры "длина (4 байта, big-endian) + тип (1 байт) + данные".
+Тип b'J' - пакет JSON-запросов, b'B' - пакет двоичных запросов пути.
+Модуль не зависит от RobotPathFinder и numpy, поэтому быстро импортируется
+в процессах ботов.
+"""
+import json
+import socket
+import struct
+from typing import List, Tuple, Optional, Dict, Iterable
+
+DEFAULT_SOCKET = '/tmp/robot_path.sock'
+
+FRAME_HEADER = struct.Struct('!IB')
+KIND_JSON = ord('J')
+KIND_BINARY = ord('B')
+KIND_ERROR = ord('E')
+
+# Двоичный пакет: метод и число запросов, затем (start_row, start_col, end_row, end_col)
+BINARY_HEADER = struct.Struct('!BH')
+BINARY_QUERY = struct.Struct('!4H')
+# Длина пути - 4 байта: путь по карте до 65535x65535 бывает длиннее 65534 клеток,
+# а NO_PATH не совпадает ни с одной возможной длиной
+BINARY_LENGTH = struct.Struct('!I')
+BINARY_CELL = struct.Struct('!2H')
+NO_PATH = 0xFFFFFFFF
+BINARY_METHODS = ['astar', 'ida', 'multires']
+
+MAX_FRAME = 64 * 1024 * 1024
+
+
+class PathServiceError(Exception):
+    """Ошибка, которую вернул сервис планирования"""
+
+
+def send_frame(sock: socket.socket, kind: int, payload: bytes):
+    """Отправка одного кадра"""
+    sock.sendall(FRAME_HEADER.pack(len(payload), kind) + payload)
+
+
+def recv_frame(sock: socket.socket) -> Optional[Tuple[int, bytes]]:
+    """Приём одного кадра, None - соединение закрыто"""
+    header = _recv_exact(sock, FRAME_HEADER.size)
+    if header is None:
+        return None
+    length, kind = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME:
+        raise PathServiceError(f"Слишком большой кадр: {length} байт")
+    payload = _recv_exact(sock, length)
+    if payload is None:
+        return None
+    return kind, payload
+
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            return None
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+
+def encode_binary_queries(pairs: Iterable[Tuple[Tuple[int, int], Tuple[int, int]]],
+                          method: str = 'astar') -> bytes:
+    """Упаковка пакета запросов пути в двоичный формат"""
+    pairs = list(pairs)
+    parts = [BINARY_HEADER.pack(BINARY_METHODS.index(method), len(pairs))]
+    for (sr, sc), (er, ec) in pairs:
+        parts.append(BINARY_QUERY.pack(sr, sc, er, ec))
+    return b''.join(parts)
+
+
+def decode_binary_queries(payload: bytes) -> Tuple[str, List[Tuple[Tuple[int, int], Tuple[int, int]]]]:
+    """Распаковка двоичного пакета запросов: (метод, [(start, end), ...])"""
+    method, count = BINARY_HEADER.unpack_from(payload)
+    pairs = []
+    offset = BINARY_HEADER.size
+    for _ in range(count):
+        sr, sc, er, ec = BINARY_QUERY.unpack_from(payload, offset)
+        pairs.append(((sr, sc), (er, ec)))
+        offset += BINARY_QUERY.size
+    return BINARY_METHODS[method], pairs
+
+
+def encode_binary_paths(paths: List[Optional[List[Tuple[int, int]]]]) -> bytes:
+    """Упаковка найденных путей: длина пути (NO_PATH - не найден) и клетки"""
+    parts = []
+    for path in paths:
+        if path is None:
+            parts.append(BINARY_LENGTH.pack(NO_PATH))
+            continue
+        parts.append(BINARY_LENGTH.pack(len(path)))
+        parts.extend(BINARY_CELL.pack(r, c) for r, c in path)
+    return b''.join(parts)
+
+
+def decode_binary_paths(payload: bytes, count: int) -> List[Optional[List[Tuple[int, int]]]]:
+    """Распаковка ответа на двоичный пакет из count запросов"""
+    paths = []
+    offset = 0
+    for _ in range(count):
+        (length,) = BINARY_LENGTH.unpack_from(payload, offset)
+        offset += BINARY_LENGTH.size
+        if length == NO_PATH:
+            paths.append(None)
+            continue
+        paths.append([cell for cell in BINARY_CELL.iter_unpack(
+            payload[offset:offset + length * BINARY_CELL.size])])
+        offset += length * BINARY_CELL.size
+    return paths
+
+
+class PathClient:
+    """
+    Тонкий клиент сервиса планирования
+
+    Пример:
+        with PathClient() as planner:
+            path = planner.find_path((0, 0), (5, 7))
+    """
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, timeout: Optional[float] = 10.0):
+        self.socket_path = socket_path
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(socket_path)
+        # Версия карты на сервере по последнему ответу
+        self.grid_version = None
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _exchange(self, kind: int, payload: bytes) -> Tuple[int, bytes]:
+        send_frame(self.sock, kind, payload)
+        frame = recv_frame(self.sock)
+        if frame is None:
+            raise PathServiceError("Сервис закрыл соединение")
+        if frame[0] == KIND_ERROR:
+            raise PathServiceError(frame[1].decode('utf-8'))
+        return frame
+
+    def batch(self, requests: List[Dict]) -> List:
+        """
+        Пакет JSON-запросов за один обмен с сервисом
+
+        Args:
+            requests: Список запросов вида {"op": "path", "start": [r, c], ...}
+
+        Returns:
+            List: Результаты в том же порядке. Ошибка отдельного запроса
+                  возвращается как PathServiceError на его месте
+        """
+        _, payload = self._exchange(KIND_JSON, json.dumps({'requests': requests}).encode('utf-8'))
+        response = json.loads(payload)
+        self.grid_version = response.get('version')
+        results = []
+        for result in response['results']:
+            if isinstance(result, dict) and 'error' in result:
+                results.append(PathServiceError(result['error']))
+            else:
+                results.append(result)
+        return results
+
+    def _call(self, request: Dict):
+        result = self.batch([request])[0]
+        if isinstance(result, PathServiceError):
+            raise result
+        return result
+
+    def find_path(self, start: Tuple[int, int], end: Tuple[int, int],
+                  method: str = 'astar') -> Optional[List[Tuple[int, int]]]:
+        """Поиск пути ('astar', 'ida' или 'multires')"""
+        path = self._call({'op': 'path', 'start': start, 'end': end, 'method': method})
+        return [tuple(cell) for cell in path] if path is not None else None
+
+    def find_paths(self, pairs: List[Tuple[Tuple[int, int], Tuple[int, int]]],
+                   method: str = 'astar') -> List[Optional[List[Tuple[int, int]]]]:
+        """Пакет запросов пути в двоичном формате - для больших пакетов"""
+        _, payload = self._exchange(KIND_BINARY, encode_binary_queries(pairs, method))
+        return decode_binary_paths(payload, len(pairs))
+
+    def find_path_through_points(self, points: List[Tuple[int, int]],
+                                 method: str = 'astar') -> Optional[List[Tuple[int, int]]]:
+        """Путь через несколько точек в заданном порядке"""
+        path = self._call({'op': 'through_points', 'points': points, 'method': method})
+        return [tuple(cell) for cell in path] if path is not None else None
+
+    def find_k_shortest_paths(self, start: Tuple[int, int], end: Tuple[int, int],
+                              k: int = 3) -> List[List[Tuple[int, int]]]:
+        """k кратчайших путей без циклов"""
+        paths = self._call({'op': 'k_paths', 'start': start, 'end': end, 'k': k})
+        return [[tuple(cell) for cell in path] for path in paths]
+
+    def flow_next_step(self, position: Tuple[int, int],
+                       goal: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        """Следующий шаг к цели по полю направлений"""
+        step = self._call({'op': 'next_step', 'position': position, 'goal': goal})
+        return tuple(step) if step is not None else None
+
+    def is_reachable(self, start: Tuple[int, int], end: Tuple[int, int]) -> bool:
+        return self._call({'op': 'reachable', 'start': start, 'end': end})
+
+    def validate_path(self, path: List[Tuple[int, int]]) -> bool:
+        return self._call({'op': 'validate', 'path': path})
+
+    def update_cells(self, changes: Dict[Tuple[int, int], int]) -> bool:
+        """Точечное изменение карты на сервере, True - карта изменилась"""
+        return self._call({'op': 'update_cells',
+                           'changes': [[r, c, value] for (r, c), value in changes.items()]})
+
+    def update_environment(self, matrix: List[List[int]]) -> bool:
+        """Замена всей карты на сервере, True - карта изменилась"""
+        return self._call({'op': 'update_environment', 'matrix': matrix})
+
+    def info(self) -> Dict:
+        """Размер карты, версия и настройки поиска на сервере"""
+        return self._call({'op': 'info'})
@@ -0,0 +1,198 @@
+from typing import List, Tuple, Optional, Dict
+import os
+import tempfile
+import time
+import numpy as np
+
+SPEED_FILE = 'robot_speed.txt'
+
+# Курс робота по шагу (dr, dc): 0 - вверх, дальше по часовой стрелке через 45°.
+# Индекс таблицы: (dr + 1) * 3 + (dc + 1) для шага, приведённого к знакам
+_HEADINGS = np.array([7, 0, 1,
+                      6, -1, 2,
+                      5, 4, 3])
+
+
+def load_robot_speeds(filename: str = SPEED_FILE) -> Dict[str, float]:
+    """
+    Чтение калибровки робота из файла вида
+        speed_rotate: 0.57
+        speed_move: 1.0
+
+    Returns:
+        Dict[str, float]: {'speed_rotate': секунды на поворот 90°,
+                           'speed_move': секунды на клетку}
+    """
+    speeds = {}
+    with open(filename, 'r', encoding='utf-8') as file:
+        for line in file:
+            if ':' not in line:
+                continue
+            key, value = line.split(':', 1)
+            speeds[key.strip()] = float(value)
+    return speeds
+
+
+def save_robot_speeds(speeds: Dict[str, float], filename: str = SPEED_FILE):
+    """
+    Атомарная запись калибровки в формате robot_speed.txt
+
+    Файл пишется во временный рядом и подменяется через os.replace, поэтому
+    бот, читающий его в этот момент, видит либо старые, либо новые значения,
+    но не обрезанный файл. Порядок строк (speed_rotate, затем speed_move)
+    сохраняется - боты читают значения по номеру строки.
+    """
+    text = ('speed_rotate: ' + str(speeds['speed_rotate']) + '\n' +
+            'speed_move: ' + str(speeds['speed_move']) + ' ')
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_name = tempfile.mkstemp(prefix='.robot_speed', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_name, filename)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+class PathMetrics:
+    """
+    Метрики пути: длины и время шагов и их накопленные суммы
+
+    Считаются один раз NumPy при создании объекта, после этого оставшееся
+    расстояние и время до любой точки пути отвечаются за O(1), пока робот едет.
+    Путь может быть как по клеткам, так и упрощённым (optimize_path):
+    прямой или диагональный отрезок стоит столько же, сколько его клетки.
+    """
+
+    def __init__(self, path: List[Tuple[int, int]],
+                 move_time: float = 1.0,
+                 rotate_time: float = 0.57,
+                 initial_heading: Optional[Tuple[int, int]] = None,
+                 right_only: bool = False):
+        """
+        Args:
+            path: Путь робота (список позиций)
+            move_time: Время проезда одной клетки, с (speed_move)
+            rotate_time: Время поворота на 90°, с (speed_rotate)
+            initial_heading: Направление робота перед стартом (Direction.*),
+                None - поворот перед первым шагом не учитывается
+            right_only: Робот поворачивает только направо (как Goto в map.py):
+                поворот налево на 90° стоит трёх поворотов направо
+        """
+        self.path = list(path)
+        self.move_time = move_time
+        self.rotate_time = rotate_time
+        self.right_only = right_only
+
+        points = np.asarray(self.path, dtype=np.int64).reshape(-1, 2)
+        steps = np.diff(points, axis=0)
+        abs_steps = np.abs(steps)
+        longer = abs_steps.max(axis=1)
+        shorter = abs_steps.min(axis=1)
+
+        # Октильная длина, как в calculate_path_cost: диагональ 1.414, прямо 1
+        self.step_distances = longer + (1.414 - 1.0) * shorter
+
+        # Повороты перед каждым шагом в четвертях оборота (45° = 0.5)
+        headings = _HEADINGS[(np.sign(steps[:, 0]) + 1) * 3 + np.sign(steps[:, 1]) + 1]
+        previous = np.empty_like(headings)
+        if len(headings):
+            previous[1:] = headings[:-1]
+            if initial_heading is not None:
+                previous[0] = _HEADINGS[(initial_heading[0] + 1) * 3 + initial_heading[1] + 1]
+            else:
+                previous[0] = headings[0]
+        clockwise = (headings - previous) % 8
+        if right_only:
+            eighths = clockwise
+        else:
+            eighths = np.minimum(clockwise, 8 - clockwise)
+        self.step_turns = eighths / 2.0
+
+        self.step_times = self.step_distances * move_time + self.step_turns * rotate_time
+
+        # Накопленные суммы: элемент i - от старта до точки i пути
+        self.cumulative_distance = np.concatenate(([0.0], np.cumsum(self.step_distances)))
+        self.cumulative_time = np.concatenate(([0.0], np.cumsum(self.step_times)))
+
+        # Первая позиция пути для каждой клетки, чтобы спрашивать по координатам
+        self._index: Dict[Tuple[int, int], int] = {}
+        for i, position in enumerate(self.path):
+            self._index.setdefault(tuple(position), i)
+
+    @classmethod
+    def from_speed_file(cls, path: List[Tuple[int, int]], filename: str = SPEED_FILE,
+                        **kwargs) -> 'PathMetrics':
+        """Метрики с калибровкой из robot_speed.txt"""
+        speeds = load_robot_speeds(filename)
+        return cls(path, move_time=speeds.get('speed_move', 1.0),
+                   rotate_time=speeds.get('speed_rotate', 0.57), **kwargs)
+
+    def __len__(self):
+        return len(self.path)
+
+    @property
+    def total_distance(self) -> float:
+        return float(self.cumulative_distance[-1])
+
+    @property
+    def total_time(self) -> float:
+        return float(self.cumulative_time[-1])
+
+    @property
+    def total_turns(self) -> float:
+        """Суммарный поворот в четвертях оборота (90°)"""
+        return float(self.step_turns.sum())
+
+    def index_of(self, position) -> int:
+        """
+        Номер точки пути: число - уже номер, клетка (row, col) - первое её
+        появление в пути
+        """
+        if isinstance(position, (int, np.integer)):
+            index = int(position)
+            if not -len(self.path) <= index < len(self.path):
+                raise IndexError(f"Точки {index} нет в пути")
+            return index % len(self.path)
+        try:
+            return self._index[tuple(position)]
+        except KeyError:
+            raise ValueError(f"Клетки {position} нет в пути") from None
+
+    def distance_between(self, start, end) -> float:
+        """Расстояние по пути от точки start до точки end"""
+        return float(self.cumulative_distance[self.index_of(end)] -
+                     self.cumulative_distance[self.index_of(start)])
+
+    def time_between(self, start, end) -> float:
+        """Время в пути от точки start до точки end, с"""
+        return float(self.cumulative_time[self.index_of(end)] -
+                     self.cumulative_time[self.index_of(start)])
+
+    def remaining_distance(self, current, target=-1) -> float:
+        """Оставшееся расстояние от текущей точки до цели (по умолчанию до финиша)"""
+        return self.distance_between(current, target)
+
+    def remaining_time(self, current, target=-1) -> float:
+        """Оставшееся время от текущей точки до цели (по умолчанию до финиша), с"""
+        return self.time_between(current, target)
+
+    def eta(self, current, target=-1, now: Optional[float] = None) -> float:
+        """
+        Ожидаемый момент прибытия в цель
+
+        Args:
+            current: Текущая точка (номер или клетка)
+            target: Цель (номер или клетка), по умолчанию финиш
+            now: Текущее время (по умолчанию time.time())
+
+        Returns:
+            float: Время прибытия в тех же единицах, что и now
+        """
+        if now is None:
+            now = time.time()
+        return now + self.time_between(current, target)
@@ -0,0 +1,181 @@
+"""
+Долгоживущий сервис планирования путей на Unix-сокете
+
+Сервис держит одну карту RobotPathFinder со всеми кэшами (ориентиры,
+поля направлений, пирамида, альтернативные маршруты), а боты обращаются
+к нему через path_client.PathClient и не тратят время на запуск и прогрев.
+
+Запуск:
+    python path_service.py --map map.json
+    python path_service.py --map plan.png --cell-size 10 --diagonal
+"""
+import argparse
+import json
+import os
+import socketserver
+import threading
+from typing import List, Dict
+
+from RobotPathFinder import RobotPathFinder
+from path_client import (DEFAULT_SOCKET, KIND_JSON, KIND_BINARY, KIND_ERROR,
+                         send_frame, recv_frame, decode_binary_queries,
+                         encode_binary_paths)
+
+
+def _cell(value) -> tuple:
+    return (int(value[0]), int(value[1]))
+
+
+class PathService:
+    """Обработка запросов к общей карте (один поиск в каждый момент времени)"""
+
+    def __init__(self, finder: RobotPathFinder):
+        self.finder = finder
+        # RobotPathFinder не потокобезопасен: поиски и изменения карты по очереди
+        self.lock = threading.Lock()
+
+    def find_path(self, start, end, method: str = 'astar'):
+        if method == 'ida':
+            return self.finder.find_path_ida(start, end)
+        if method == 'multires':
+            return self.finder.find_path_multires(start, end)
+        if method == 'astar':
+            return self.finder.find_path_astar(start, end)
+        raise ValueError(f"Неизвестный метод поиска: {method}")
+
+    def _map_cell(self, row, col) -> tuple:
+        """Клетка из запроса клиента с проверкой, что она лежит на карте"""
+        row, col = int(row), int(col)
+        if not (0 <= row < self.finder.rows and 0 <= col < self.finder.cols):
+            raise ValueError(f"Клетка ({row}, {col}) вне карты "
+                             f"{self.finder.rows}x{self.finder.cols}")
+        return (row, col)
+
+    def handle_request(self, request: Dict):
+        """Выполнение одного JSON-запроса (вызывается под self.lock)"""
+        finder = self.finder
+        op = request.get('op')
+        if op == 'path':
+            return self.find_path(_cell(request['start']), _cell(request['end']),
+                                  request.get('method', 'astar'))
+        if op == 'through_points':
+            return finder.find_path_through_points([_cell(p) for p in request['points']],
+                                                   request.get('method', 'astar'))
+        if op == 'k_paths':
+            return finder.find_k_shortest_paths(_cell(request['start']), _cell(request['end']),
+                                                int(request.get('k', 3)))
+        if op == 'next_step':
+            return finder.flow_next_step(_cell(request['position']), _cell(request['goal']))
+        if op == 'reachable':
+            return finder.is_reachable(_cell(request['start']), _cell(request['end']))
+        if op == 'validate':
+            return finder.validate_path([_cell(p) for p in request['path']])
+        if op == 'update_cells':
+            # Все клетки проверяются до изменения карты: ошибочный запрос
+            # возвращает ошибку и не применяется частично
+            return finder.update_cells({self._map_cell(r, c): int(value)
+                                        for r, c, value in request['changes']})
+        if op == 'update_environment':
+            return finder.update_environment(request['matrix'])
+        if op == 'info':
+            return {'rows': finder.rows, 'cols': finder.cols,
+                    'version': finder.grid_version,
+                    'allow_diagonal': finder.allow_diagonal,
+                    'robot_size': finder.robot_size}
+        raise ValueError(f"Неизвестная операция: {op}")
+
+    def handle_json(self, payload: bytes) -> bytes:
+        """Пакет JSON-запросов: ошибка одного запроса не прерывает остальные"""
+        requests = json.loads(payload)['requests']
+        results = []
+        with self.lock:
+            for request in requests:
+                try:
+                    results.append(self.handle_request(request))
+                except (KeyError, TypeError, ValueError, IndexError) as e:
+                    results.append({'error': f"{type(e).__name__}: {e}"})
+            version = self.finder.grid_version
+        return json.dumps({'version': version, 'results': results}).encode('utf-8')
+
+    def handle_binary(self, payload: bytes) -> bytes:
+        """Двоичный пакет запросов пути"""
+        method, pairs = decode_binary_queries(payload)
+        with self.lock:
+            paths = [self.find_path(start, end, method) for start, end in pairs]
+        return encode_binary_paths(paths)
+
+
+class _ConnectionHandler(socketserver.BaseRequestHandler):
+    """Соединение бота: кадры обрабатываются по одному до закрытия сокета"""
+
+    def handle(self):
+        service = self.server.service
+        while True:
+            frame = recv_frame(self.request)
+            if frame is None:
+                return
+            kind, payload = frame
+            try:
+                if kind == KIND_JSON:
+                    send_frame(self.request, KIND_JSON, service.handle_json(payload))
+                elif kind == KIND_BINARY:
+                    send_frame(self.request, KIND_BINARY, service.handle_binary(payload))
+                else:
+                    raise ValueError(f"Неизвестный тип кадра: {kind}")
+            except Exception as e:
+                send_frame(self.request, KIND_ERROR, f"{type(e).__name__}: {e}".encode('utf-8'))
+
+
+class PathServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Сервер на Unix-сокете, каждое соединение в своём потоке"""
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, service: PathService):
+        # Сокет от предыдущего запуска мешает bind
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.service = service
+        self.socket_path = socket_path
+        super().__init__(socket_path, _ConnectionHandler)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def load_matrix(filename: str, cell_size: int) -> List[List[int]]:
+    """Карта из JSON-файла (вложенные списки) или из изображения плана"""
+    if filename.lower().endswith('.json'):
+        with open(filename, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    from floor_plan import load_floor_plan
+    return load_floor_plan(filename, cell_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сервис планирования путей робота")
+    parser.add_argument('--map', required=True, help="JSON с матрицей или изображение плана")
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, help="Путь к Unix-сокету")
+    parser.add_argument('--cell-size', type=int, default=10, help="Размер клетки плана в пикселях")
+    parser.add_argument('--diagonal', action='store_true', help="Разрешить диагональные шаги")
+    parser.add_argument('--robot-size', type=int, default=1, help="Размер робота в клетках")
+    parser.add_argument('--landmarks', type=int, default=0, help="Число ориентиров ALT")
+    args = parser.parse_args()
+
+    finder = RobotPathFinder(load_matrix(args.map, args.cell_size),
+                             allow_diagonal=args.diagonal,
+                             robot_size=args.robot_size,
+                             num_landmarks=args.landmarks)
+    server = PathServer(args.socket, PathService(finder))
+    print(f"Сервис планирования: карта {finder.rows}x{finder.cols}, сокет {args.socket}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Остановка сервиса")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
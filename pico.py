@@ -1,6 +1,52 @@
 from gpiozero import Motor, PhaseEnableMotor
 from gpiozero import SourceMixin, CompositeDevice
 import gpiozero
+import math
+import threading
+import time
+
+
+def trapezoid_profile(distance, v_max, accel):
+    """
+    Split a move into acceleration, cruise and deceleration phases.
+
+    *distance* is the area under the speed curve, in "seconds at full
+    speed" (the unit of the ``speed_move``/``speed_rotate`` calibration).
+    If the move is too short to reach *v_max* the profile is triangular and
+    the peak speed is lowered instead.
+
+    :returns:
+        A tuple ``(ramp_time, cruise_time, peak_speed)``.
+    """
+    if distance <= 0:
+        return 0.0, 0.0, 0.0
+    if not 0 < v_max <= 1:
+        raise ValueError('v_max must be between 0 and 1')
+    if accel <= 0:
+        raise ValueError('accel must be positive')
+    ramp_time = v_max / accel
+    if v_max * ramp_time >= distance:
+        # Triangular profile: accelerate to the middle, then brake
+        peak = math.sqrt(distance * accel)
+        return peak / accel, 0.0, peak
+    return ramp_time, (distance - v_max * ramp_time) / v_max, v_max
+
+
+def profile_speed(t, ramp_time, cruise_time, peak_speed):
+    """
+    Speed of a :func:`trapezoid_profile` at time *t* since its start.
+    """
+    if t <= 0:
+        return 0.0
+    if t < ramp_time:
+        return peak_speed * t / ramp_time
+    t -= ramp_time
+    if t < cruise_time:
+        return peak_speed
+    t -= cruise_time
+    if t < ramp_time:
+        return peak_speed * (1 - t / ramp_time)
+    return 0.0
 
 class Robot(SourceMixin, CompositeDevice):
     """
@@ -64,6 +110,8 @@ class Robot(SourceMixin, CompositeDevice):
         super().__init__(left_motor=left, right_motor=right,
                          _order=('left_motor', 'right_motor'),
                          pin_factory=pin_factory)
+        self._profile_thread = None
+        self._profile_cancel = threading.Event()
 
     @property
     def value(self):
@@ -77,6 +125,7 @@ class Robot(SourceMixin, CompositeDevice):
 
     @value.setter
     def value(self, value):
+        self.cancel_profile()
         self.left_motor.value, self.right_motor.value = value
 
     def forward(self, speed=1, *, curve_left=0, curve_right=0):
@@ -106,6 +155,7 @@ class Robot(SourceMixin, CompositeDevice):
         if curve_left != 0 and curve_right != 0:
             raise ValueError("curve_left and curve_right can't be used at "
                              "the same time")
+        self.cancel_profile()
         self.left_motor.forward(speed * (1 - curve_left))
         self.right_motor.forward(speed * (1 - curve_right))
 
@@ -137,6 +187,7 @@ class Robot(SourceMixin, CompositeDevice):
         if curve_left != 0 and curve_right != 0:
             raise ValueError("curve_left and curve_right can't be used at "
                              "the same time")
+        self.cancel_profile()
         self.left_motor.backward(speed * (1 - curve_left))
         self.right_motor.backward(speed * (1 - curve_right))
 
@@ -150,6 +201,7 @@ class Robot(SourceMixin, CompositeDevice):
             Speed at which to drive the motors, as a value between 0 (stopped)
             and 1 (full speed). The default is 1.
         """
+        self.cancel_profile()
         self.right_motor.forward(speed)
         self.left_motor.backward(speed)
 
@@ -163,6 +215,7 @@ class Robot(SourceMixin, CompositeDevice):
             Speed at which to drive the motors, as a value between 0 (stopped)
             and 1 (full speed). The default is 1.
         """
+        self.cancel_profile()
         self.left_motor.forward(speed)
         self.right_motor.backward(speed)
 
@@ -175,13 +228,150 @@ class Robot(SourceMixin, CompositeDevice):
         robot is turning left at half-speed, it will turn right at half-speed.
         If the robot is currently stopped it will remain stopped.
         """
+        self.cancel_profile()
         self.left_motor.reverse()
         self.right_motor.reverse()
 
 
     def stop(self):
         """
-        Stop the robot.
+        Stop the robot. Any running motion profile is cancelled first.
         """
+        self.cancel_profile()
         self.left_motor.stop()
         self.right_motor.stop()
+
+    def move_profile(self, distance_s, v_max=1, accel=2, *, backward=False,
+                     rate=50, wait=True):
+        """
+        Drive straight with a trapezoidal speed profile: ramp up at *accel*,
+        cruise at *v_max* and ramp down to a stop.
+
+        The PWM duty is updated on a fixed-rate timer thread. Each tick uses
+        the profile speed at the middle of the tick, so the distance covered
+        matches *distance_s* regardless of *rate*. Smooth ramps prevent wheel
+        slip, so a higher *v_max* can be used without losing position.
+
+        :param float distance_s:
+            Distance in seconds of driving at full speed (e.g. the number of
+            cells multiplied by the calibrated ``speed_move``).
+
+        :param float v_max:
+            Top speed, between 0 and 1. The default is 1.
+
+        :param float accel:
+            Acceleration in full-speed units per second. The default is 2,
+            i.e. 0.5 s from standstill to full speed.
+
+        :param bool backward:
+            Drive backward instead of forward.
+
+        :param int rate:
+            Timer frequency in Hz. The default is 50.
+
+        :param bool wait:
+            Block until the profile finishes (the default). Otherwise return
+            at once; use :meth:`wait_profile` or :meth:`cancel_profile`.
+        """
+        sign = -1 if backward else 1
+        self._start_profile(distance_s, v_max, accel, sign, sign, rate, wait)
+
+    def turn_profile(self, turn_s, v_max=1, accel=4, *, clockwise=True,
+                     rate=50, wait=True):
+        """
+        Turn on the spot with a trapezoidal speed profile.
+
+        :param float turn_s:
+            Rotation in seconds of turning at full speed (e.g. the calibrated
+            ``speed_rotate`` for a 90 degree turn).
+
+        :param float v_max:
+            Top turning speed, between 0 and 1. The default is 1.
+
+        :param float accel:
+            Acceleration in full-speed units per second. The default is 4.
+
+        :param bool clockwise:
+            Turn right (the default) or left.
+
+        :param int rate:
+            Timer frequency in Hz. The default is 50.
+
+        :param bool wait:
+            Block until the turn finishes (the default).
+        """
+        sign = 1 if clockwise else -1
+        self._start_profile(turn_s, v_max, accel, sign, -sign, rate, wait)
+
+    @property
+    def profile_active(self):
+        """
+        Returns :data:`True` while a motion profile is running.
+        """
+        thread = self._profile_thread
+        return thread is not None and thread.is_alive()
+
+    def wait_profile(self, timeout=None):
+        """
+        Wait for the running motion profile to finish.
+
+        :returns:
+            :data:`True` if no profile is running any more.
+        """
+        thread = self._profile_thread
+        if thread is not None:
+            thread.join(timeout)
+        return not self.profile_active
+
+    def cancel_profile(self):
+        """
+        Cancel the running motion profile (the motors are stopped).
+
+        Manual commands (:meth:`forward`, :meth:`backward`, :meth:`left`,
+        :meth:`right`, :meth:`reverse`, :meth:`stop` and setting
+        :attr:`value`) call this first, so the profile thread never
+        overwrites them.
+        """
+        thread = self._profile_thread
+        if thread is not None and thread is not threading.current_thread():
+            self._profile_cancel.set()
+            thread.join()
+        self._profile_thread = None
+
+    def _start_profile(self, distance, v_max, accel, left_sign, right_sign,
+                       rate, wait):
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        profile = trapezoid_profile(distance, v_max, accel)
+        self.cancel_profile()
+        self._profile_cancel = cancel = threading.Event()
+        self._profile_thread = threading.Thread(
+            target=self._run_profile,
+            args=(profile, left_sign, right_sign, 1 / rate, cancel),
+            daemon=True)
+        self._profile_thread.start()
+        if wait:
+            self.wait_profile()
+
+    def _run_profile(self, profile, left_sign, right_sign, period, cancel):
+        ramp_time, cruise_time, peak_speed = profile
+        total = 2 * ramp_time + cruise_time
+        start = time.monotonic()
+        tick = 0
+        try:
+            while not cancel.is_set():
+                t = time.monotonic() - start
+                if t >= total:
+                    break
+                # Hold until the next tick: use the speed at the tick middle
+                speed = profile_speed(min(t + period / 2, total), *profile)
+                # Not through self.value: that would cancel this very profile
+                self.left_motor.value = left_sign * speed
+                self.right_motor.value = right_sign * speed
+                tick += 1
+                # Fixed-rate deadlines, so a late tick doesn't shift the rest
+                cancel.wait(max(0.0, min(start + tick * period, start + total)
+                                - time.monotonic()))
+        finally:
+            self.left_motor.stop()
+            self.right_motor.stop()
@@ -0,0 +1,336 @@
+"""
+Симулятор транспортёра: робот с дифференциальным приводом, поле NFC-меток
+на карте RobotPathFinder и цикл asyncio на виртуальных часах
+
+Маршруты через MotionExecutor идут по виртуальному времени, поэтому
+выполняются в тысячи раз быстрее реального - для тестов и бенчмарков
+пропускной способности без физического робота.
+"""
+import asyncio
+import math
+import random
+import selectors
+from typing import List, Tuple, Optional, Dict
+
+from RobotPathFinder import RobotPathFinder
+from motion_primitives import compile_path, HEADINGS
+from motion_executor import MotionExecutor
+
+
+class VirtualClock:
+    """Виртуальные часы: время идёт только при явном advance"""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def time(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        if seconds > 0:
+            self.now += seconds
+
+
+class _VirtualSelector:
+    """
+    Селектор, который вместо ожидания таймаута переводит виртуальные часы.
+    Готовые события (call_soon_threadsafe) проверяются без ожидания.
+    """
+
+    def __init__(self, clock: VirtualClock):
+        self._selector = selectors.DefaultSelector()
+        self.clock = clock
+
+    def select(self, timeout=None):
+        events = self._selector.select(0)
+        if events or timeout == 0:
+            return events
+        if timeout is None:
+            # Ждать нечего, кроме событий из других потоков
+            return self._selector.select(None)
+        self.clock.advance(timeout)
+        return []
+
+    def __getattr__(self, name):
+        return getattr(self._selector, name)
+
+
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):
+    """Цикл событий asyncio, у которого asyncio.sleep не ждёт реального времени"""
+
+    def __init__(self, clock: Optional[VirtualClock] = None):
+        self.clock = clock or VirtualClock()
+        super().__init__(_VirtualSelector(self.clock))
+
+    def time(self) -> float:
+        return self.clock.now
+
+    def run_in_executor(self, executor, func, *args):
+        """Блокирующие вызовы (чтение метки) выполняются сразу, без пула потоков"""
+        future = self.create_future()
+        try:
+            future.set_result(func(*args))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+class SimulatedRobot:
+    """
+    Робот с дифференциальным приводом (интерфейс pico.Robot)
+
+    Положение (row, col) в клетках карты, курс - радианы по часовой стрелке
+    от направления "вверх". На полной скорости робот проезжает клетку за
+    cell_time секунд и поворачивается на 90° за turn_time секунд - те же
+    величины, что speed_move и speed_rotate в robot_speed.txt. Положение
+    пересчитывается точно (движение по дуге) в момент каждой команды
+    и каждого запроса позиции.
+    """
+
+    def __init__(self, clock: VirtualClock, position: Tuple[float, float] = (0, 0),
+                 heading: Tuple[int, int] = HEADINGS[1],
+                 cell_time: float = 1.0, turn_time: float = 0.57,
+                 speed_noise: float = 0.0, seed: Optional[int] = None,
+                 finder: Optional[RobotPathFinder] = None):
+        """
+        Args:
+            clock: Виртуальные часы
+            position: Начальная клетка (row, col)
+            heading: Начальное направление (Direction.*)
+            cell_time: Время проезда клетки на полной скорости, с
+            turn_time: Время поворота на 90° на полной скорости, с
+            speed_noise: Разброс скорости колёс на каждую команду (доля),
+                имитирует проскальзывание и разряд аккумулятора
+            seed: Зерно генератора шума
+            finder: Карта для проверки столкновений (None - без проверки)
+        """
+        self.clock = clock
+        self.row, self.col = float(position[0]), float(position[1])
+        self.theta = math.atan2(heading[1], -heading[0])
+        self.cell_time = cell_time
+        self.turn_time = turn_time
+        self.speed_noise = speed_noise
+        self.rng = random.Random(seed)
+        self.finder = finder
+
+        self._left = 0.0
+        self._right = 0.0
+        self._gain = 1.0
+        self._last_time = clock.time()
+
+        self.collided = False
+        self.distance = 0.0         # пройденный путь, клеток
+        self.commands = 0           # число команд моторам
+
+    # ---- интерфейс pico.Robot ----
+
+    @property
+    def value(self) -> Tuple[float, float]:
+        return (self._left, self._right)
+
+    @value.setter
+    def value(self, value):
+        self._set_wheels(*value)
+
+    def forward(self, speed=1, *, curve_left=0, curve_right=0):
+        self._set_wheels(speed * (1 - curve_left), speed * (1 - curve_right))
+
+    def backward(self, speed=1, *, curve_left=0, curve_right=0):
+        self._set_wheels(-speed * (1 - curve_left), -speed * (1 - curve_right))
+
+    def left(self, speed=1):
+        self._set_wheels(-speed, speed)
+
+    def right(self, speed=1):
+        self._set_wheels(speed, -speed)
+
+    def reverse(self):
+        self._set_wheels(-self._left, -self._right)
+
+    def stop(self):
+        self._set_wheels(0.0, 0.0)
+
+    # ---- кинематика ----
+
+    @property
+    def pose(self) -> Tuple[float, float, float]:
+        """(row, col, курс в радианах) на текущий момент виртуального времени"""
+        self._integrate()
+        return self.row, self.col, self.theta
+
+    @property
+    def cell(self) -> Tuple[int, int]:
+        """Клетка, в которой сейчас центр робота"""
+        row, col, _ = self.pose
+        return (int(math.floor(row + 0.5)), int(math.floor(col + 0.5)))
+
+    def _set_wheels(self, left: float, right: float):
+        self._integrate()
+        self._left, self._right = float(left), float(right)
+        self._gain = 1.0 + self.rng.gauss(0.0, self.speed_noise) if self.speed_noise else 1.0
+        self.commands += 1
+
+    def _integrate(self):
+        now = self.clock.time()
+        dt = now - self._last_time
+        self._last_time = now
+        if dt <= 0 or self.collided or (not self._left and not self._right):
+            return
+        # Линейная скорость в клетках/с, угловая в рад/с (по часовой стрелке)
+        v = (self._left + self._right) / 2 / self.cell_time * self._gain
+        w = (self._left - self._right) / 2 * (math.pi / 2) / self.turn_time * self._gain
+        theta0 = self.theta
+        theta1 = theta0 + w * dt
+        if abs(w) < 1e-12:
+            d_row = -v * dt * math.cos(theta0)
+            d_col = v * dt * math.sin(theta0)
+        else:
+            d_row = -v / w * (math.sin(theta1) - math.sin(theta0))
+            d_col = -v / w * (math.cos(theta1) - math.cos(theta0))
+        self.row += d_row
+        self.col += d_col
+        self.theta = math.remainder(theta1, 2 * math.pi)
+        self.distance += abs(v) * dt
+        self._check_collision()
+
+    def _check_collision(self):
+        if self.finder is None:
+            return
+        row, col = int(math.floor(self.row + 0.5)), int(math.floor(self.col + 0.5))
+        if not self.finder.is_valid_position(row, col):
+            self.collided = True
+            self._left = self._right = 0.0
+
+
+class SimulatedTagField:
+    """
+    NFC-метки в центрах клеток карты
+
+    read_checkpoint подходит для MotionExecutor, а read_passive_target и
+    ntag2xx_read_block повторяют PN532, поэтому read_nfc_tag из ботов
+    читает метки симулятора без изменений (строка и столбец - символы 8 и 10).
+    """
+
+    def __init__(self, finder: RobotPathFinder, robot: SimulatedRobot,
+                 cells: Optional[List[Tuple[int, int]]] = None,
+                 read_radius: float = 0.2, miss_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        """
+        Args:
+            finder: Карта; по умолчанию метки во всех свободных клетках
+            robot: Симулируемый робот
+            cells: Клетки с метками (None - все свободные)
+            read_radius: На каком расстоянии от центра метка читается, клеток
+            miss_rate: Вероятность не прочитать метку при опросе
+            seed: Зерно генератора промахов
+        """
+        self.robot = robot
+        self.read_radius = read_radius
+        self.miss_rate = miss_rate
+        self.rng = random.Random(seed)
+        if cells is None:
+            cells = [(r, c) for r in range(finder.rows) for c in range(finder.cols)
+                     if finder.is_valid_position(r, c)]
+        self.tags = set(cells)
+        self.reads = 0
+        self._pages: Dict[int, bytes] = {}
+
+    def tag_under_robot(self) -> Optional[Tuple[int, int]]:
+        """Метка в радиусе чтения от центра робота"""
+        row, col, _ = self.robot.pose
+        cell = (int(math.floor(row + 0.5)), int(math.floor(col + 0.5)))
+        if cell not in self.tags:
+            return None
+        if math.hypot(row - cell[0], col - cell[1]) > self.read_radius:
+            return None
+        if self.miss_rate and self.rng.random() < self.miss_rate:
+            return None
+        return cell
+
+    def read_checkpoint(self) -> Optional[Tuple[int, int]]:
+        """Клетка прочитанной метки или None (для MotionExecutor)"""
+        self.reads += 1
+        return self.tag_under_robot()
+
+    def read_passive_target(self, timeout: float = 1.0):
+        """Как PN532: UID метки (7 байт, NTAG) или None после таймаута"""
+        cell = self.tag_under_robot()
+        if cell is None:
+            self.robot.clock.advance(timeout)
+            return None
+        text = f"cell at {cell[0]},{cell[1]}".encode('utf-8')
+        text += b'\x00' * (-len(text) % 4 + 4)
+        self._pages = {4 + i: text[i * 4:i * 4 + 4] for i in range(len(text) // 4)}
+        return bytearray([0x04, cell[0] & 0xFF, cell[1] & 0xFF, 0, 0, 0, 0])
+
+    def ntag2xx_read_block(self, page: int) -> Optional[bytes]:
+        """Как PN532: 4 байта страницы последней прочитанной метки"""
+        return self._pages.get(page)
+
+
+def simulate_route(finder: RobotPathFinder, path: List[Tuple[int, int]],
+                   heading: Tuple[int, int] = HEADINGS[1],
+                   cell_time: float = 1.0, turn_time: float = 0.57,
+                   speed_noise: float = 0.0, seed: Optional[int] = None,
+                   calibrator=None, nfc_poll_interval: float = 0.05,
+                   move_time: Optional[float] = None,
+                   rotate_time: Optional[float] = None) -> Dict:
+    """
+    Прогон маршрута как в goto_route бота: path -> compile_path ->
+    MotionExecutor, только на симуляторе и виртуальных часах
+
+    cell_time и turn_time - настоящие скорости робота, move_time и
+    rotate_time - калибровка исполнителя (по умолчанию совпадает с ними).
+
+    Returns:
+        Dict: duration (виртуальные секунды), arrived (центр робота в
+        конечной клетке), collided, visited (прочитанные метки), final_cell,
+        commands (число команд моторам)
+    """
+    loop = VirtualTimeEventLoop()
+    try:
+        robot = SimulatedRobot(loop.clock, path[0], heading, cell_time, turn_time,
+                               speed_noise, seed, finder)
+        tags = SimulatedTagField(finder, robot)
+        executor = MotionExecutor(robot,
+                                  move_time=cell_time if move_time is None else move_time,
+                                  rotate_time=turn_time if rotate_time is None else rotate_time,
+                                  read_checkpoint=tags.read_checkpoint,
+                                  nfc_poll_interval=nfc_poll_interval,
+                                  tag_offset=tags.read_radius - nfc_poll_interval / cell_time / 2,
+                                  calibrator=calibrator, loop=loop)
+        commands, _ = compile_path(path, heading)
+        start = loop.time()
+        route = executor.run_route(commands, checkpoints=path)
+        loop.run_until_complete(asyncio.wrap_future(route, loop=loop))
+        return {
+            'duration': loop.time() - start,
+            'arrived': robot.cell == tuple(path[-1]),
+            'collided': robot.collided,
+            'visited': list(executor.visited),
+            'final_cell': robot.cell,
+            'commands': robot.commands,
+        }
+    finally:
+        loop.close()
+
+
+# Пример использования: пропускная способность маршрутов на карте 20x20
+if __name__ == "__main__":
+    import time
+
+    grid = [[0] * 20 for _ in range(20)]
+    for r in range(3, 17):
+        grid[r][10] = 1
+    finder = RobotPathFinder(grid)
+    route = finder.find_path_astar((0, 0), (19, 19))
+
+    runs = 200
+    started = time.perf_counter()
+    results = [simulate_route(finder, route, speed_noise=0.002, seed=i) for i in range(runs)]
+    elapsed = time.perf_counter() - started
+    virtual = sum(result['duration'] for result in results)
+    print(f"Маршрутов: {runs}, виртуальное время {virtual:.0f} с, реальное {elapsed:.2f} с "
+          f"(x{virtual / elapsed:.0f})")
+    print(f"Доехали: {sum(result['arrived'] for result in results)}, "
+          f"столкновений: {sum(result['collided'] for result in results)}")
@@ -12,9 +12,16 @@ from dataclasses import dataclass
 from typing import Optional, Tuple
 import RPi.GPIO as GPIO
 import pygame  # для эмуляции геймпада или работы с реальным через USB
+from control_loop import ControlLoop, OverrunPolicy
+from telemetry import TelemetryBuffer
+from motion_watchdog import Watchdog
+from motor_output import PWMOutput, output_counters
 
 # =================== КОНСТАНТЫ ===================
 MIN_DUTY = 120  # мин. сигнал, при котором мотор начинает вращение
+CONTROL_RATE = 50  # частота цикла управления (Гц)
+TELEMETRY_FILE = 'telemetry_tank2.npz'  # дамп телеметрии при завершении
+WATCHDOG_TIMEOUT = 1.0  # без итерации цикла дольше - моторы глушатся (с)
 
 # Пины драйвера (используем BCM нумерацию)
 MOT_RA = 2   # GPIO2
@@ -52,6 +59,10 @@ class GMotor:
         self.pwmA.start(0)
         self.pwmB.start(0)
         
+        # Запись в ШИМ только при реальном изменении заполнения
+        self.outA = PWMOutput(self.pwmA)
+        self.outB = PWMOutput(self.pwmB)
+        
         self.target_speed = 0
         self.current_speed = 0
         self.smooth_factor = 80  # 0-100, чем больше - тем плавнее
@@ -94,16 +105,16 @@ class GMotor:
         
         if speed > 0:
             # Вперед
-            self.pwmA.ChangeDutyCycle(duty)
-            self.pwmB.ChangeDutyCycle(0)
+            self.outA.set(duty)
+            self.outB.set(0)
         elif speed < 0:
             # Назад
-            self.pwmA.ChangeDutyCycle(0)
-            self.pwmB.ChangeDutyCycle(duty)
+            self.outA.set(0)
+            self.outB.set(duty)
         else:
             # Стоп
-            self.pwmA.ChangeDutyCycle(0)
-            self.pwmB.ChangeDutyCycle(0)
+            self.outA.set(0)
+            self.outB.set(0)
     
     def set_smoothness(self, factor: int):
         """Установка плавности (0-100)"""
@@ -117,8 +128,8 @@ class GMotor:
         """Мгновенная остановка"""
         self.target_speed = 0
         self.current_speed = 0
-        self.pwmA.ChangeDutyCycle(0)
-        self.pwmB.ChangeDutyCycle(0)
+        self.outA.set(0, force=True)
+        self.outB.set(0, force=True)
         
     def cleanup(self):
         """Очистка ресурсов"""
@@ -361,6 +372,17 @@ class TankController:
         # Флаг для экстренной остановки
         self.emergency_stop = False
         
+        # Телеметрия моторов и таймингов цикла (сохраняется при завершении)
+        self.telemetry = TelemetryBuffer()
+        
+        # Цикл управления по абсолютным дедлайнам (без дрейфа частоты)
+        # Сторож: если цикл завис (например, на чтении контроллера), моторы глушатся
+        self.watchdog = Watchdog(stop=self.stop_motors, timeout=WATCHDOG_TIMEOUT,
+                                 telemetry=self.telemetry)
+        
+        self.control_loop = ControlLoop(rate_hz=CONTROL_RATE, policy=OverrunPolicy.SKIP,
+                                        telemetry=self.telemetry, watchdog=self.watchdog)
+        
         print("\n✓ Система готова к работе")
         print("\nУправление:")
         print("  Левый стик/WSAD - движение")
@@ -400,10 +422,12 @@ class TankController:
             self.motorR.stop()
             self.motorL.stop()
             
-            # Ждем отпускания кнопки
+            # Ждем отпускания кнопки (моторы стоят, сторож не нужен)
+            self.watchdog.disarm()
             while self.ps2.button('select'):
                 self.ps2.read()
                 time.sleep(0.01)
+            self.watchdog.arm()
                 
             self.emergency_stop = False
             print("✓ Снята экстренная остановка")
@@ -463,6 +487,8 @@ class TankController:
         print("\nЗапуск основного цикла...")
         
         try:
+            self.control_loop.start()
+            self.watchdog.arm()
             while self.is_running:
                 # Обработка управления
                 self.process_controls()
@@ -471,11 +497,13 @@ class TankController:
                 self.motorR.smooth_tick()
                 self.motorL.smooth_tick()
                 
-                # Отображение статуса
-                self.display_status()
+                # Телеметрия каждый такт, статус на экран раз в секунду
+                self.telemetry.motor(self.motorL.current_speed, self.motorR.current_speed)
+                if self.control_loop.cycles % CONTROL_RATE == 0:
+                    self.display_status()
                 
-                # Задержка для стабильной работы (50 Гц)
-                time.sleep(0.02)
+                # Ожидание следующего такта (50 Гц) по абсолютному дедлайну
+                self.control_loop.wait()
                 
         except KeyboardInterrupt:
             print("\n\n⚠ Получен сигнал прерывания (Ctrl+C)")
@@ -483,9 +511,21 @@ class TankController:
         finally:
             self.shutdown()
             
+    def stop_motors(self):
+        """Остановка обоих моторов (вызывается и из потока сторожа)"""
+        self.motorR.stop()
+        self.motorL.stop()
+        
     def shutdown(self):
         """Корректное завершение работы"""
         print("\n\nЗавершение работы...")
+        self.watchdog.close()
+        print(self.control_loop.report())
+        print(self.watchdog.report())
+        saved = self.telemetry.dump(TELEMETRY_FILE)
+        print(f"Телеметрия: {saved} событий в {TELEMETRY_FILE} (просмотр: python3 telemetry.py {TELEMETRY_FILE})")
+        print(output_counters(self.motorR.outA, self.motorR.outB,
+                              self.motorL.outA, self.motorL.outB))
         
         # Остановка моторов
         print("Остановка моторов...")
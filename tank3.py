@@ -11,12 +11,19 @@ import RPi.GPIO as GPIO
 from enum import Enum
 from typing import List, Optional
 import os
+from control_loop import ControlLoop, OverrunPolicy
+from telemetry import TelemetryBuffer
+from motion_watchdog import Watchdog
+from motor_output import PWMOutput, DirectionPins, output_counters
 
 # =================== НАСТРОЙКИ ===================
 MIN_DUTY = 120        # мин. ШИМ для старта мотора (0-255)
 DEAD_ZONE = 15        # мертвая зона стиков
 MOTOR_MAX = 255       # максимальная скорость
 PWM_FREQ = 1000       # частота ШИМ (Гц)
+CONTROL_RATE = 50     # частота цикла управления (Гц)
+TELEMETRY_FILE = 'telemetry_tank3.npz'  # дамп телеметрии при завершении
+WATCHDOG_TIMEOUT = 1.0     # без итерации цикла дольше - моторы глушатся (с)
 
 # =================== ПИНЫ GPIO ===================
 # Пины драйвера SZDoit (BCM нумерация)
@@ -277,6 +284,10 @@ class SZDoitMotor:
         self.pwm = GPIO.PWM(en_pin, PWM_FREQ)
         self.pwm.start(0)
         
+        # Запись в ШИМ и пины направления только при реальном изменении
+        self.out = PWMOutput(self.pwm)
+        self.direction_pins = DirectionPins([in1_pin, in2_pin])
+        
         # Переменные состояния
         self.target_speed = 0
         self.current_speed = 0
@@ -315,33 +326,30 @@ class SZDoitMotor:
         if speed > 0:
             self._set_direction(1)
             duty = (speed / MOTOR_MAX) * 100
-            self.pwm.ChangeDutyCycle(duty)
+            self.out.set(duty)
         elif speed < 0:
             self._set_direction(-1)
             duty = (-speed / MOTOR_MAX) * 100
-            self.pwm.ChangeDutyCycle(duty)
+            self.out.set(duty)
         else:
             self._set_direction(0)
-            self.pwm.ChangeDutyCycle(0)
+            self.out.set(0)
             
-    def _set_direction(self, direction: int):
-        """Установка направления вращения"""
+    def _set_direction(self, direction: int, force: bool = False):
+        """Установка направления вращения (оба пина одной записью)"""
         if direction == 1:
-            GPIO.output(self.in1_pin, GPIO.HIGH)
-            GPIO.output(self.in2_pin, GPIO.LOW)
+            self.direction_pins.set((GPIO.HIGH, GPIO.LOW), force)
         elif direction == -1:
-            GPIO.output(self.in1_pin, GPIO.LOW)
-            GPIO.output(self.in2_pin, GPIO.HIGH)
+            self.direction_pins.set((GPIO.LOW, GPIO.HIGH), force)
         else:
-            GPIO.output(self.in1_pin, GPIO.LOW)
-            GPIO.output(self.in2_pin, GPIO.LOW)
+            self.direction_pins.set((GPIO.LOW, GPIO.LOW), force)
             
     def stop(self):
         """Мгновенная остановка"""
         self.target_speed = 0
         self.current_speed = 0
-        self.pwm.ChangeDutyCycle(0)
-        self._set_direction(0)
+        self.out.set(0, force=True)
+        self._set_direction(0, force=True)
         
     def cleanup(self):
         """Очистка ресурсов"""
@@ -388,6 +396,17 @@ class TankRobotController:
         self.is_running = True
         self.last_status_time = time.time()
         
+        # Телеметрия моторов и таймингов цикла (сохраняется при завершении)
+        self.telemetry = TelemetryBuffer()
+        
+        # Цикл управления по абсолютным дедлайнам (без дрейфа частоты)
+        # Сторож: если цикл завис (например, на чтении контроллера), моторы глушатся
+        self.watchdog = Watchdog(stop=self.stop_motors, timeout=WATCHDOG_TIMEOUT,
+                                 telemetry=self.telemetry)
+        
+        self.control_loop = ControlLoop(rate_hz=CONTROL_RATE, policy=OverrunPolicy.SKIP,
+                                        telemetry=self.telemetry, watchdog=self.watchdog)
+        
     def print_header(self):
         """Вывод информации о подключении"""
         print("=" * 70)
@@ -539,6 +558,8 @@ class TankRobotController:
         print("Запуск основного цикла управления...")
         
         try:
+            self.control_loop.start()
+            self.watchdog.arm()
             while self.is_running:
                 # Обработка управления
                 self.process_controls()
@@ -547,8 +568,11 @@ class TankRobotController:
                 self.motorR.smooth_update()
                 self.motorL.smooth_update()
                 
-                # Задержка для стабильной работы (50 Гц)
-                time.sleep(0.02)
+                # Телеметрия моторов (без вывода на экран)
+                self.telemetry.motor(self.motorL.current_speed, self.motorR.current_speed)
+                
+                # Ожидание следующего такта (50 Гц) по абсолютному дедлайну
+                self.control_loop.wait()
                 
         except KeyboardInterrupt:
             print("\n\nПолучен сигнал прерывания")
@@ -556,9 +580,21 @@ class TankRobotController:
         finally:
             self.shutdown()
             
+    def stop_motors(self):
+        """Остановка обоих моторов (вызывается и из потока сторожа)"""
+        self.motorR.stop()
+        self.motorL.stop()
+        
     def shutdown(self):
         """Корректное завершение работы"""
         print("\nЗавершение работы...")
+        self.watchdog.close()
+        print(self.control_loop.report())
+        print(self.watchdog.report())
+        saved = self.telemetry.dump(TELEMETRY_FILE)
+        print(f"Телеметрия: {saved} событий в {TELEMETRY_FILE} (просмотр: python3 telemetry.py {TELEMETRY_FILE})")
+        print(output_counters(self.motorR.out, self.motorR.direction_pins,
+                              self.motorL.out, self.motorL.direction_pins))
         
         # Остановка моторов
         print("Остановка моторов...")
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Телеметрия движения: кольцевой буфер событий с монотонными метками времени
+
+Команды моторам, прочитанные метки и тайминги цикла управления пишутся
+в заранее выделенный массив NumPy со структурными записями. Добавление
+события - одна запись в массив (около микросекунды), без вывода на экран
+и без выделения памяти, поэтому его можно оставлять в горячем цикле.
+При переполнении старые события перезаписываются.
+
+Просмотр сохранённого файла:
+    python3 telemetry.py telemetry.npz --summary
+    python3 telemetry.py telemetry.npz --kind TAG LOOP --tail 50
+"""
+
+import argparse
+import itertools
+import os
+import tempfile
+import time
+from enum import IntEnum
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+TELEMETRY_FILE = 'telemetry.npz'
+DEFAULT_CAPACITY = 65536
+
+# Одно событие: время (time.monotonic), тип и два числа, смысл которых зависит от типа
+EVENT_DTYPE = np.dtype([('t', '<f8'), ('kind', 'u1'), ('a', '<f4'), ('b', '<f4')])
+
+
+class EventKind(IntEnum):
+    """Типы событий и смысл полей a, b"""
+    MOTOR = 1      # a, b - скорость левого и правого мотора
+    COMMAND = 2    # a - номер команды маршрута, b - её длительность, с
+    TAG = 3        # a, b - строка и столбец прочитанной метки
+    LOOP = 4       # a - время работы итерации, b - опоздание пробуждения, с
+    STOP = 5       # аварийная остановка
+    MARK = 6       # произвольная отметка (a, b на усмотрение вызывающего)
+    STALL = 7      # сторож: a - длительность зависания, с; b - 0 при срабатывании, 1 при восстановлении
+
+
+# Целые коды для горячего цикла: запись int быстрее, чем IntEnum
+MOTOR, COMMAND, TAG, LOOP, STOP, MARK, STALL = (int(kind) for kind in EventKind)
+
+
+class TelemetryBuffer:
+    """
+    Кольцевой буфер событий фиксированного размера
+
+    Пример:
+        telemetry = TelemetryBuffer()
+        telemetry.record(MOTOR, left, right)
+        ...
+        telemetry.dump('telemetry.npz')
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            capacity: Сколько последних событий хранится
+            clock: Источник меток времени (для симулятора - виртуальные часы)
+        """
+        if capacity <= 0:
+            raise ValueError("Размер буфера должен быть положительным")
+        self.capacity = capacity
+        self._records = np.zeros(capacity, dtype=EVENT_DTYPE)
+        # next() у itertools.count атомарен под GIL: потоки исполнителя
+        # и бота не получат один и тот же слот
+        self._counter = itertools.count()
+        self._written = 0
+        self._clock = clock
+        # Для перевода монотонного времени в настенное при чтении дампа
+        self.wall_offset = time.time() - clock()
+
+    def record(self, kind: int, a: float = 0.0, b: float = 0.0):
+        """Добавление события (kind - код EventKind)"""
+        i = next(self._counter)
+        self._records[i % self.capacity] = (self._clock(), kind, a, b)
+        self._written = i + 1
+
+    def motor(self, left: float, right: float):
+        self.record(MOTOR, left, right)
+
+    def tag(self, row: int, col: int):
+        self.record(TAG, row, col)
+
+    @property
+    def total(self) -> int:
+        """Сколько событий записано за всё время"""
+        return self._written
+
+    @property
+    def dropped(self) -> int:
+        """Сколько старых событий перезаписано"""
+        return max(0, self._written - self.capacity)
+
+    def snapshot(self) -> np.ndarray:
+        """Копия хранящихся событий в порядке записи"""
+        written = self._written
+        if written <= self.capacity:
+            return self._records[:written].copy()
+        start = written % self.capacity
+        return np.concatenate((self._records[start:], self._records[:start]))
+
+    def clear(self):
+        self._counter = itertools.count()
+        self._written = 0
+
+    def dump(self, filename: str = TELEMETRY_FILE) -> int:
+        """
+        Сохранение событий в .npz (атомарно, как robot_speed.txt)
+
+        Returns:
+            int: Число сохранённых событий
+        """
+        events = self.snapshot()
+        directory = os.path.dirname(os.path.abspath(filename))
+        fd, tmp_name = tempfile.mkstemp(prefix='.telemetry', suffix='.npz', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                np.savez(file, events=events,
+                         wall_offset=np.float64(self.wall_offset),
+                         dropped=np.int64(self.dropped))
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_name, filename)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+        return len(events)
+
+
+def load_dump(filename: str = TELEMETRY_FILE) -> Tuple[np.ndarray, Dict]:
+    """
+    Чтение файла, сохранённого TelemetryBuffer.dump
+
+    Returns:
+        Tuple: (массив событий EVENT_DTYPE, {'wall_offset', 'dropped'})
+    """
+    with np.load(filename) as data:
+        events = data['events']
+        meta = {'wall_offset': float(data['wall_offset']), 'dropped': int(data['dropped'])}
+    return events, meta
+
+
+def filter_events(events: np.ndarray, kinds: Optional[List[EventKind]] = None) -> np.ndarray:
+    """События только заданных типов"""
+    if not kinds:
+        return events
+    return events[np.isin(events['kind'], [int(kind) for kind in kinds])]
+
+
+def format_event(event, t0: float) -> str:
+    """Строка события: время от начала записи, тип и поля"""
+    kind = EventKind(int(event['kind']))
+    t = float(event['t']) - t0
+    a, b = float(event['a']), float(event['b'])
+    if kind == EventKind.MOTOR:
+        details = f"левый {a:+.2f}, правый {b:+.2f}"
+    elif kind == EventKind.COMMAND:
+        details = f"команда #{int(a)}, {b:.3f} с"
+    elif kind == EventKind.TAG:
+        details = f"метка ({int(a)}, {int(b)})"
+    elif kind == EventKind.LOOP:
+        details = f"работа {a * 1000:.2f} мс, опоздание {b * 1000:.2f} мс"
+    elif kind == EventKind.STOP:
+        details = "аварийная остановка"
+    elif kind == EventKind.STALL:
+        details = (f"поток ожил после {a:.3f} с" if b else
+                   f"нет отметок {a:.3f} с, моторы остановлены")
+    else:
+        details = f"{a:g}, {b:g}"
+    return f"{t:10.4f}  {kind.name:<7} {details}"
+
+
+def summary(events: np.ndarray, meta: Optional[Dict] = None) -> str:
+    """Сводка: интервал записи, число событий по типам, тайминги цикла"""
+    if not len(events):
+        return "Событий нет"
+    t = events['t']
+    lines = [f"Событий: {len(events)}, за {t[-1] - t[0]:.2f} с"]
+    if meta is not None:
+        started = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(t[0] + meta['wall_offset']))
+        lines[0] += f", начало {started}"
+        if meta['dropped']:
+            lines.append(f"Перезаписано старых событий: {meta['dropped']}")
+    for kind in EventKind:
+        count = int(np.count_nonzero(events['kind'] == kind))
+        if count:
+            lines.append(f"  {kind.name:<7} {count}")
+
+    loops = filter_events(events, [EventKind.LOOP])
+    if len(loops):
+        work = loops['a'] * 1000
+        late = loops['b'] * 1000
+        lines.append(f"Работа итерации: среднее {work.mean():.2f} мс, "
+                     f"p99 {np.percentile(work, 99):.2f} мс, макс {work.max():.2f} мс")
+        lines.append(f"Опоздание пробуждения: среднее {late.mean():.3f} мс, "
+                     f"p99 {np.percentile(late, 99):.2f} мс, макс {late.max():.2f} мс")
+
+    tags = filter_events(events, [EventKind.TAG])
+    if len(tags):
+        cells = [(int(row), int(col)) for row, col in zip(tags['a'], tags['b'])]
+        lines.append(f"Метки: {cells}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Просмотр дампа телеметрии")
+    parser.add_argument('filename', nargs='?', default=TELEMETRY_FILE)
+    parser.add_argument('--kind', nargs='+', choices=[kind.name for kind in EventKind],
+                        help="Показывать только события этих типов")
+    parser.add_argument('--tail', type=int, default=0,
+                        help="Показать только последние N событий")
+    parser.add_argument('--summary', action='store_true', help="Только сводка")
+    args = parser.parse_args()
+
+    events, meta = load_dump(args.filename)
+    if args.summary:
+        print(summary(events, meta))
+        return
+    t0 = float(events['t'][0]) if len(events) else 0.0
+    selected = filter_events(events, [EventKind[name] for name in args.kind or ()])
+    if args.tail:
+        selected = selected[-args.tail:]
+    for event in selected:
+        print(format_event(event, t0))
+
+
+if __name__ == "__main__":
+    main()
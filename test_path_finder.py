@@ -0,0 +1,44 @@
+"""
+Проверки RobotPathFinder без оборудования
+Запуск: python3 -m pytest test_path_finder.py
+"""
+import math
+import random
+
+from RobotPathFinder import RobotPathFinder
+
+
+def make_map(size: int, density: float = 0.2, seed: int = 5):
+    """Случайная карта со свободными углами (1 - препятствие)"""
+    rnd = random.Random(seed)
+    matrix = [[1 if rnd.random() < density else 0 for _ in range(size)]
+              for _ in range(size)]
+    matrix[0][0] = matrix[size - 1][size - 1] = 0
+    return matrix
+
+
+def test_ida_iterations_bounded_on_weighted_map():
+    """IDA* с дробными стоимостями не делает итерацию на каждое значение f"""
+    matrix = make_map(40)
+    start, end = (0, 0), (39, 39)
+    finder = RobotPathFinder(matrix, clearance_weight=0.5, memory_budget=10000)
+    optimal = RobotPathFinder(matrix, clearance_weight=0.5).find_path_astar(start, end)
+
+    path = finder.find_path_astar(start, end)
+
+    assert finder.validate_path(path) and path[0] == start and path[-1] == end
+    epsilon = RobotPathFinder.IDA_EPSILON
+    cost, best = finder.path_cost(path), finder.path_cost(optimal)
+    assert cost <= best * (1 + epsilon) + 1e-9
+    # Порог растёт минимум в (1 + epsilon) раз от эвристики старта до стоимости пути
+    bound = 1 + math.ceil(math.log(cost * (1 + epsilon) / (2 * 39)) / math.log(1 + epsilon))
+    assert finder.ida_iterations <= bound
+
+
+def test_ida_exact_on_integral_map():
+    """Без дробных стоимостей IDA* по умолчанию остаётся оптимальным"""
+    matrix = make_map(30, seed=1)
+    finder = RobotPathFinder(matrix, memory_budget=10000)
+    path = finder.find_path_astar((0, 0), (29, 29))
+    optimal = RobotPathFinder(matrix).find_path_astar((0, 0), (29, 29))
+    assert len(path) == len(optimal)
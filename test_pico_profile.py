@@ -0,0 +1,41 @@
+"""
+Проверки профилей движения pico.Robot на ложных пинах gpiozero
+Запуск: python3 -m pytest test_pico_profile.py
+"""
+import time
+
+import pytest
+
+pytest.importorskip('gpiozero')
+
+from gpiozero import Motor
+from gpiozero.pins.mock import MockFactory, MockPWMPin
+
+from pico import Robot
+
+
+def make_robot() -> Robot:
+    """Робот на ложных ШИМ-пинах, без оборудования"""
+    factory = MockFactory(pin_class=MockPWMPin)
+    return Robot(Motor(4, 14, pin_factory=factory),
+                 Motor(17, 18, pin_factory=factory),
+                 pin_factory=factory)
+
+
+def test_manual_forward_cancels_profile():
+    """Ручная команда во время профиля (wait=False) не перезаписывается им"""
+    robot = make_robot()
+    try:
+        robot.move_profile(5, v_max=0.5, accel=1, wait=False)
+        time.sleep(0.1)
+        assert robot.profile_active
+
+        robot.forward(1)
+
+        assert not robot.profile_active
+        # Несколько тактов таймера профиля (50 Гц): скорость не должна меняться
+        time.sleep(0.2)
+        assert robot.value == (1, 1)
+    finally:
+        robot.stop()
+        robot.close()
@@ -80,7 +80,8 @@ def func(message):
         start_welcome(message)
         
     elif message.text == "Показать карту":
-        bot.send_message(message.chat.id, text="Привет тут будем Показать карту")
+        # Карта с последним маршрутом (PNG кэшируется, повторный показ бесплатный)
+        bot.send_photo(message.chat.id, photo=path_finder.render_path_png(full_path, points_to_visit))
         #search_point()
         gogo()
 
@@ -756,6 +757,10 @@ def handle_query(call):
                 text=visualization,
                 parse_mode="Markdown"
             )
+            bot.send_photo(
+                chat_id=call.message.chat.id,
+                photo=path_finder.render_path_png(full_path, points_to_visit)
+            )
             
             bot.send_message(
             chat_id=call.message.chat.id,
@@ -6,6 +6,11 @@ from pico import Robot
 from gpiozero import Motor
 from time import sleep
 from RobotPathFinder import RobotPathFinder
+from motion_primitives import compile_path, HEADINGS
+from motion_executor import MotionExecutor
+from auto_calibration import OnlineCalibrator
+from telemetry import TelemetryBuffer, TELEMETRY_FILE
+from motion_watchdog import Watchdog
 import board
 import busio
 from adafruit_pn532.i2c import PN532_I2C
@@ -28,6 +33,9 @@ vk_session = vk_api.VkApi(token=VK_TOKEN)
 vk = vk_session.get_api()
 longpoll = VkBotLongPoll(vk_session, GROUP_ID)
 
+# Телеметрия маршрутов: команды, метки, остановки (сохраняется при выходе)
+telemetry = TelemetryBuffer()
+
 # Инициализация робота
 robot = Robot(left=Motor(23, 24), right=Motor(27, 22))
 
@@ -219,7 +227,7 @@ def gogo():
                 new_element = (row, col)
                 if new_element not in current_path:
                     current_path.append(new_element)
-                print(f"Точка добавлена: {new_element}")
+                telemetry.tag(row, col)
             except (IndexError, ValueError):
                 print("Ошибка чтения координат")
 
@@ -227,8 +235,8 @@ def move_robot():
     """Движение робота"""
     global optimized_path, current_path
     
-    print('Вперёд')
     robot.forward()
+    telemetry.motor(1, 1)
     sleep(1)
     gogo()
     
@@ -239,45 +247,51 @@ def move_robot():
     else:
         return True
 
+def read_checkpoint():
+    """Клетка с NFC метки под роботом или None (для исполнителя маршрута)"""
+    uid = pn532.read_passive_target(timeout=0.1)
+    if uid is None:
+        return None
+    text = read_nfc_tag(uid)
+    try:
+        return (int(text[8]), int(text[10]))
+    except (TypeError, IndexError, ValueError):
+        return None
+
+# Сторож маршрута: если цикл исполнителя завис, моторы глушатся и маршрут отменяется
+watchdog = Watchdog(stop=lambda: executor.emergency_stop(), telemetry=telemetry)
+
+# Исполнитель маршрутов: моторы, метки и сообщения на одном цикле asyncio.
+# Время клетки и поворота уточняется по меткам и сохраняется в robot_speed.txt
+executor = MotionExecutor(robot, move_time=speeds[1], rotate_time=speeds[0],
+                          read_checkpoint=read_checkpoint,
+                          calibrator=OnlineCalibrator(),
+                          telemetry=telemetry,
+                          watchdog=watchdog)
+
 def goto_route(user_id):
-    """Движение по маршруту"""
-    global optimized_path, current_path
+    """Движение по маршруту (не блокирует обработчик сообщений)"""
+    global optimized_path
     
     if not optimized_path:
         send_message(user_id, "❌ Маршрут не найден")
         return
+    if executor.busy:
+        send_message(user_id, "⏳ Робот уже едет по маршруту")
+        return
     
-    send_message(user_id, "🚀 Начинаю движение по маршруту..." , create_route_keyboard())
-    
-    for item in optimized_path:
-        robot.forward()
-        sleep(1)
-        gogo()
-        
-        uid = pn532.read_passive_target(timeout=0.5)
-        while uid is None:
-            robot.forward()
-            sleep(0.5)
-            uid = pn532.read_passive_target(timeout=0.5)
-        
-        robot.stop()
-        
-        # Поворот к следующей точке
-        if optimized_path.index(item) + 1 != len(optimized_path):
-            point_start_x = item[0]
-            point_start_y = item[1]
-            point_end_x = optimized_path[optimized_path.index(item) + 1][0]
-            point_end_y = optimized_path[optimized_path.index(item) + 1][1]
-            
-            if point_start_x < point_end_x or point_start_y > point_end_y:
-                robot.right()
-            elif point_start_x > point_end_x or point_start_y > point_end_y:
-                robot.left()
-            
-            sleep(speeds[0])
-            robot.stop()
-    
-    send_message(user_id, "✅ Маршрут завершен!")
+    commands, heading = compile_path(optimized_path, HEADINGS[ir])
+    executor.notify = lambda text: send_message(user_id, text)
+    route = executor.run_route(commands, checkpoints=optimized_path)
+    send_message(user_id, "🛑 Для остановки нажмите «Стоп»", create_robot_keyboard())
+    
+    def finished(future):
+        # Направление меняется, только если робот доехал до конца
+        global ir, rotate
+        if not future.cancelled() and future.exception() is None and future.result():
+            ir = HEADINGS.index(heading)
+            rotate = rt[ir]
+    route.add_done_callback(finished)
 
 def format_path_for_vk(path):
     """Форматирование пути для VK"""
@@ -348,7 +362,7 @@ def handle_message(user_id, text):
         send_message(user_id, "➡️ Поворот направо")
     
     elif text == "🛑 Стоп":
-        robot.stop()
+        executor.emergency_stop()
         send_message(user_id, "🛑 Стоп")
     
     # Кнопки построения маршрута
@@ -390,7 +404,7 @@ def handle_message(user_id, text):
     
     # Подтверждение
     elif text == "✅ Да":
-        threading.Thread(target=goto_route, args=(user_id,)).start()
+        goto_route(user_id)
 
     
     elif text == "❌ Нет":
@@ -452,4 +466,6 @@ if __name__ == "__main__":
         main()
     except KeyboardInterrupt:
         print("\nБот остановлен")
-        robot.stop()
\ No newline at end of file
+        executor.shutdown()
+        watchdog.close()
+        telemetry.dump(TELEMETRY_FILE)
\ No newline at end of file